@@ -2,12 +2,30 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import IO, Any, Optional, cast, overload
 
-from .io import load_document, save_document, validate_input_files
-from .processing import apply_conditionals, extract_fields, replace_placeholders
+from .io import (
+    DocxSource,
+    clone_document,
+    load_document,
+    read_worksheet,
+    save_document,
+    validate_input_files,
+)
+from .processing import (
+    DEFAULT_FIELD_MAPPINGS,
+    CompiledTemplate,
+    apply_conditionals,
+    compile_template,
+    diff_compiled,
+    extract_fields,
+    fill_compiled,
+    fill_document,
+    replace_placeholders,
+)
 from .validation import validate_mandatory_fields
 from .config import load_placeholder_schema
 from .benchmark import benchmark_processing
@@ -16,10 +34,19 @@ from .security import reject_macros, cleanup_uploads
 
 __all__ = [
     "fill_template",
+    "prepare_template",
+    "PreparedTemplate",
     "extract_fields",
     "replace_placeholders",
     "apply_conditionals",
+    "fill_document",
+    "compile_template",
+    "fill_compiled",
+    "diff_compiled",
+    "CompiledTemplate",
     "load_document",
+    "read_worksheet",
+    "clone_document",
     "save_document",
     "validate_input_files",
     "validate_mandatory_fields",
@@ -31,46 +58,148 @@ __all__ = [
 ]
 
 
+@dataclass(frozen=True)
+class PreparedTemplate:
+    """Template parsed and compiled once for filling many worksheets.
+
+    Attributes:
+        path: Location the template was loaded from, or ``None`` if it was
+            given as bytes or a file object.
+        document: Parsed template. Each fill works on a clone of it.
+        compiled: Placeholder index for ``document``.
+        schema: Placeholder mapping ``compiled`` was built from; ``None`` for
+            the default mapping.
+    """
+
+    path: Optional[Path]
+    document: Any
+    compiled: CompiledTemplate
+    schema: Optional[dict[str, str]] = None
+
+
+def prepare_template(
+    template_path: DocxSource, schema: Optional[dict[str, str]] = None
+) -> PreparedTemplate:
+    """Load and compile ``template_path`` for repeated use.
+
+    Args:
+        template_path: Template Word document as a path, bytes or binary file
+            object.
+        schema: Optional placeholder mapping the worksheets will be read with.
+
+    Returns:
+        Prepared template accepted by :func:`fill_template`.
+    """
+
+    path = Path(template_path) if isinstance(template_path, (str, Path)) else None
+    document = load_document(template_path)
+    mappings = DEFAULT_FIELD_MAPPINGS if schema is None else schema
+    return PreparedTemplate(
+        path=path,
+        document=document,
+        compiled=compile_template(document, mappings.values()),
+        schema=schema,
+    )
+
+
+@overload
 def fill_template(
-    template_path: Path | str,
-    worksheet_path: Path | str,
+    template_path: DocxSource | PreparedTemplate,
+    worksheet_path: DocxSource,
+    output_path: Path | str,
+    schema: Optional[dict[str, str]] = None,
+) -> Path: ...
+
+
+@overload
+def fill_template(
+    template_path: bytes | IO[bytes],
+    worksheet_path: DocxSource,
+    output_path: None = None,
+    schema: Optional[dict[str, str]] = None,
+) -> bytes: ...
+
+
+@overload
+def fill_template(
+    template_path: DocxSource | PreparedTemplate,
+    worksheet_path: DocxSource,
+    output_path: Optional[Path | str] = None,
+    schema: Optional[dict[str, str]] = None,
+) -> Path | bytes: ...
+
+
+def fill_template(
+    template_path: DocxSource | PreparedTemplate,
+    worksheet_path: DocxSource,
     output_path: Optional[Path | str] = None,
     schema: Optional[dict[str, str]] = None,
-) -> Path:
+) -> Path | bytes:
     """Fill ``template_path`` with values from ``worksheet_path``.
 
+    Both documents may be given as paths, bytes or binary file objects, so a
+    caller holding uploads in memory never has to touch the disk.
+
     Args:
-        template_path: Path to the template Word document.
-        worksheet_path: Path to the worksheet with answers.
+        template_path: Template Word document, or a template from
+            :func:`prepare_template` to skip re-reading and re-parsing it.
+        worksheet_path: Worksheet with answers.
         output_path: Where to save the filled document. If ``None`` a
-            timestamped file is created beside ``template_path``.
-        schema: Optional placeholder mapping loaded from JSON or YAML.
+            timestamped file is created beside a template given as a path;
+            for an in-memory template the document is returned as bytes.
+        schema: Optional placeholder mapping loaded from JSON or YAML. For a
+            prepared template it defaults to the schema it was prepared with.
 
     Returns:
-        Path to the saved document.
+        Path to the saved document, or its bytes if it was not saved. Given
+        an ``output_path`` this is always a path, and for an in-memory
+        template without one it is always bytes.
+
+    Raises:
+        ValueError: If ``schema`` differs from the one a prepared template was
+            compiled with.
 
     Example:
         >>> fill_template("template.docx", "worksheet.docx")
         PosixPath('template_20250101_120000.docx')
     """
 
-    template = Path(template_path)
-    worksheet = Path(worksheet_path)
-    validate_input_files(template, worksheet)
+    def as_path(source: Any) -> Optional[Path]:
+        return Path(source) if isinstance(source, (str, Path)) else None
+
+    worksheet = as_path(worksheet_path)
+    if isinstance(template_path, PreparedTemplate):
+        # The template was validated when it was prepared.
+        template = template_path.path
+        if schema is None:
+            schema = template_path.schema
+        elif schema != template_path.schema:
+            raise ValueError(
+                "schema differs from the one the template was prepared with"
+            )
+    else:
+        template = as_path(template_path)
+        if template is not None and worksheet is not None:
+            validate_input_files(template, worksheet)
 
-    template_doc = load_document(template)
-    worksheet_doc = load_document(worksheet)
-    validate_mandatory_fields(worksheet_doc)
+    worksheet_text = read_worksheet(worksheet_path)
+    validate_mandatory_fields(worksheet_text)
+    values = extract_fields(worksheet_text, schema)
 
-    values = extract_fields(worksheet_doc, schema)
-    replace_placeholders(template_doc, values)
-    apply_conditionals(template_doc, values)
+    if isinstance(template_path, PreparedTemplate):
+        template_doc = clone_document(template_path.document)
+        fill_compiled(template_doc, template_path.compiled, values)
+    else:
+        template_doc = load_document(template_path)
+        fill_document(template_doc, values)
 
     if output_path is None:
+        if template is None:
+            return cast(bytes, save_document(template_doc, only_modified=True))
         output_path = template.with_name(
             f"{template.stem}_{datetime.now():%Y%m%d_%H%M%S}.docx"
         )
 
     output = Path(output_path)
-    save_document(template_doc, output)
+    save_document(template_doc, output, only_modified=True)
     return output
@@ -2,23 +2,709 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
 import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Optional,
+    Sequence,
+    TypeVar,
+    cast,
+)
 from uuid import uuid4
 
-from fastapi import FastAPI, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse, Response
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from . import fill_template
-from .io import load_document
+from . import PreparedTemplate, fill_template, prepare_template
+from .batch import (
+    BatchArchive,
+    BatchResult,
+    ErrorCode,
+    error_code,
+    process_worksheet_data,
+)
+from .io import DOCX_MIME, MAX_SIZE, load_document
 from .html_export import export_html
-from .security import reject_macros, cleanup_uploads
+from .security import reject_macros
 
 OUTPUT_DIR = Path(tempfile.gettempdir()) / "faa_sc_outputs"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+TEMPLATE_DIR = Path(tempfile.gettempdir()) / "scdocbuilder_templates"
+TEMPLATE_DIR.mkdir(parents=True, exist_ok=True)
 
-app = FastAPI()
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """API runtime settings.
+
+    Attributes:
+        pool: ``"thread"`` or ``"process"``; where document generation runs.
+        workers: Size of the generation pool.
+        template_cache: Most registered templates kept parsed in memory by
+            each generation process.
+        template_store: Most registered templates kept on disk; the least
+            recently used are deleted once there are more.
+        job_queue: Most jobs that may be queued or running at once.
+    """
+
+    pool: str = "thread"
+    workers: int = min(32, (os.cpu_count() or 1) + 4)
+    template_cache: int = 16
+    template_store: int = 256
+    job_queue: int = 64
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        """Read the settings from the environment.
+
+        Unset variables keep the defaults:
+
+        * ``SCDOCBUILDER_POOL``: ``thread`` or ``process``; default
+          ``thread``.
+        * ``SCDOCBUILDER_WORKERS``: default the CPU count plus 4, at most 32.
+        * ``SCDOCBUILDER_TEMPLATE_CACHE``: default 16.
+        * ``SCDOCBUILDER_TEMPLATE_STORE``: default 256.
+        * ``SCDOCBUILDER_JOB_QUEUE``: default 64.
+
+        Raises:
+            ValueError: If any of these variables holds an invalid value: a
+                pool other than ``thread`` or ``process``, or a count that is
+                not an integer of at least 1.
+        """
+
+        pool = os.environ.get("SCDOCBUILDER_POOL", cls.pool).lower()
+        if pool not in {"thread", "process"}:
+            raise ValueError(f"SCDOCBUILDER_POOL must be thread or process: {pool}")
+        workers = int(os.environ.get("SCDOCBUILDER_WORKERS", cls.workers))
+        if workers < 1:
+            raise ValueError("SCDOCBUILDER_WORKERS must be at least 1")
+        template_cache = int(
+            os.environ.get("SCDOCBUILDER_TEMPLATE_CACHE", cls.template_cache)
+        )
+        if template_cache < 1:
+            raise ValueError("SCDOCBUILDER_TEMPLATE_CACHE must be at least 1")
+        template_store = int(
+            os.environ.get("SCDOCBUILDER_TEMPLATE_STORE", cls.template_store)
+        )
+        if template_store < 1:
+            raise ValueError("SCDOCBUILDER_TEMPLATE_STORE must be at least 1")
+        job_queue = int(os.environ.get("SCDOCBUILDER_JOB_QUEUE", cls.job_queue))
+        if job_queue < 1:
+            raise ValueError("SCDOCBUILDER_JOB_QUEUE must be at least 1")
+        return cls(
+            pool=pool,
+            workers=workers,
+            template_cache=template_cache,
+            template_store=template_store,
+            job_queue=job_queue,
+        )
+
+
+settings = Settings.from_env()
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Executor:
+    """Return the generation pool described by :data:`settings`."""
+
+    global _executor
+    if _executor is None:
+        if settings.pool == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.workers)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.workers, thread_name_prefix="scdocbuilder"
+            )
+    return _executor
+
+
+async def run_in_pool(func: Callable[..., T], *args: object) -> T:
+    """Run ``func(*args)`` in the generation pool without blocking the loop."""
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(func, *args))
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _fill_uploads(
+    template: bytes, worksheet: bytes, output_path: Optional[Path] = None
+) -> Any:
+    """Check both uploads for macros and fill the template in memory.
+
+    Runs in the generation pool, so it only takes picklable arguments.
+
+    Returns:
+        The filled document's bytes, or its path if ``output_path`` is given.
+    """
+
+    reject_macros(template)
+    reject_macros(worksheet)
+    return fill_template(template, worksheet, output_path)
+
+
+def _fill_uploads_html(template: bytes, worksheet: bytes) -> str:
+    """Fill the template like :func:`_fill_uploads` and return sanitized HTML."""
+
+    return export_html(load_document(_fill_uploads(template, worksheet)))
+
+
+_TEMPLATE_ID = re.compile(r"[0-9a-f]{64}")
+# Registered templates parsed in this process, least recently used first.
+_templates: OrderedDict[str, PreparedTemplate] = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def _template_file(template_id: str) -> Path:
+    """Return where the registered template ``template_id`` is stored.
+
+    Raises:
+        KeyError: If ``template_id`` is not a template ID.
+    """
+
+    if not _TEMPLATE_ID.fullmatch(template_id):
+        raise KeyError(template_id)
+    return TEMPLATE_DIR / f"{template_id}.docx"
+
+
+def _cache_template(template_id: str, prepared: PreparedTemplate) -> None:
+    """Keep ``prepared`` parsed, evicting the least recently used template."""
+
+    with _templates_lock:
+        _templates[template_id] = prepared
+        _templates.move_to_end(template_id)
+        while len(_templates) > settings.template_cache:
+            _templates.popitem(last=False)
+
+
+def _registered_template(template_id: str) -> PreparedTemplate:
+    """Return the parsed template ``template_id``, loading it on a cache miss.
+
+    Raises:
+        KeyError: If no template is registered under ``template_id``.
+    """
+
+    path = _template_file(template_id)
+    try:
+        # The modification time orders the stored templates for eviction.
+        os.utime(path)
+    except FileNotFoundError:
+        with _templates_lock:
+            _templates.pop(template_id, None)
+        raise KeyError(template_id) from None
+    with _templates_lock:
+        prepared = _templates.get(template_id)
+        if prepared is not None:
+            _templates.move_to_end(template_id)
+            return prepared
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        raise KeyError(template_id) from None
+    # Prepared from bytes so fills return bytes instead of saving beside it.
+    prepared = prepare_template(data)
+    _cache_template(template_id, prepared)
+    return prepared
+
+
+def _register_template(data: bytes) -> str:
+    """Validate ``data`` as a template, store it and return its ID.
+
+    The ID is the SHA-256 of the template bytes, so registering the same
+    template again returns the same ID and stores nothing new.
+
+    Raises:
+        ValueError: If ``data`` contains macros or is not a valid DOCX file.
+    """
+
+    reject_macros(data)
+    template_id = hashlib.sha256(data).hexdigest()
+    prepared = prepare_template(data)
+    target = _template_file(template_id)
+    if target.exists():
+        os.utime(target)
+    else:
+        partial_file = target.with_name(f"{template_id}.{uuid4().hex}.part")
+        partial_file.write_bytes(data)
+        os.replace(partial_file, target)
+        _prune_templates(keep=target)
+    _cache_template(template_id, prepared)
+    return template_id
+
+
+def _prune_templates(keep: Path) -> None:
+    """Delete the least recently used stored templates over the limit.
+
+    Templates are ordered by modification time, which every use refreshes.
+    ``keep``, the template just stored, is never deleted.
+    """
+
+    stored = []
+    for path in TEMPLATE_DIR.glob("*.docx"):
+        try:
+            stored.append((path.stat().st_mtime_ns, path))
+        except FileNotFoundError:
+            continue
+    stored.sort()
+    excess = len(stored) - settings.template_store
+    for _, path in stored[: max(0, excess)]:
+        if path != keep:
+            path.unlink(missing_ok=True)
+
+
+def _fill_registered(
+    template_id: str, worksheet: bytes, output_path: Optional[Path] = None
+) -> Any:
+    """Fill the registered template ``template_id`` in memory.
+
+    Returns:
+        The filled document's bytes, or its path if ``output_path`` is given.
+
+    Raises:
+        KeyError: If no template is registered under ``template_id``.
+    """
+
+    reject_macros(worksheet)
+    return fill_template(_registered_template(template_id), worksheet, output_path)
+
+
+def _fill_registered_html(template_id: str, worksheet: bytes) -> str:
+    """Fill like :func:`_fill_registered` and return sanitized HTML."""
+
+    return export_html(load_document(_fill_registered(template_id, worksheet)))
+
+
+JOB_DIR = OUTPUT_DIR / "jobs"
+JOB_DIR.mkdir(parents=True, exist_ok=True)
+# Finished jobs kept for status queries and downloads before the oldest go.
+_JOB_HISTORY = 1000
+
+
+@dataclass
+class Job:
+    """A generation request running in the background.
+
+    Attributes:
+        id: Job identifier returned to the client.
+        future: Pool future resolving to the start and end times of the fill.
+        output: Where the filled document is written.
+        filename: Download name for the filled document.
+        submitted: When the job was accepted, as a ``time.time()`` value.
+    """
+
+    id: str
+    future: Future[tuple[float, float]]
+    output: Path
+    filename: str
+    submitted: float
+
+    @property
+    def status(self) -> str:
+        """Return ``queued``, ``running``, ``done`` or ``failed``."""
+
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        if self.future.cancelled() or self.future.exception() is not None:
+            return "failed"
+        return "done"
+
+    def to_record(self) -> dict[str, Any]:
+        """Return a JSON-serializable summary of the job.
+
+        Returns:
+            Mapping with the job ``id``, ``status``, numeric ``error_code`` and
+            ``error`` message of a failed job, the ``result`` URL once done
+            and ``queued``/``run`` ``timings`` in seconds once finished.
+        """
+
+        status = self.status
+        record: dict[str, Any] = {
+            "id": self.id,
+            "status": status,
+            "error_code": 0,
+            "error": None,
+            "result": f"/jobs/{self.id}/result" if status == "done" else None,
+            "timings": {},
+        }
+        if status == "done":
+            started, finished = self.future.result()
+            record["timings"] = {
+                "queued": round(started - self.submitted, 6),
+                "run": round(finished - started, 6),
+            }
+        elif self.future.cancelled():
+            record["error_code"] = int(ErrorCode.EREPLACE)
+            record["error"] = "Job was cancelled"
+        elif status == "failed":
+            exc = cast(BaseException, self.future.exception())
+            record["error_code"] = int(error_code(exc))
+            record["error"] = str(exc)
+        return record
+
+
+_jobs: OrderedDict[str, Job] = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def _run_job(
+    template: Optional[bytes],
+    template_id: Optional[str],
+    worksheet: bytes,
+    output: Path,
+) -> tuple[float, float]:
+    """Fill one job's document into ``output`` and time it.
+
+    Returns:
+        When the fill started and finished, as ``time.time()`` values.
+    """
+
+    started = time.time()
+    if template_id is not None:
+        _fill_registered(template_id, worksheet, output)
+    else:
+        _fill_uploads(cast(bytes, template), worksheet, output)
+    return started, time.time()
+
+
+def _submit_job(
+    template: Optional[bytes],
+    template_id: Optional[str],
+    worksheet: bytes,
+    filename: str,
+) -> Job:
+    """Queue a job in the generation pool and remember it.
+
+    Raises:
+        HTTPException: 503 if :attr:`Settings.job_queue` jobs are already
+            queued or running.
+    """
+
+    job_id = uuid4().hex
+    with _jobs_lock:
+        active = sum(not job.future.done() for job in _jobs.values())
+        if active >= settings.job_queue:
+            raise HTTPException(
+                status_code=503,
+                detail="Job queue is full",
+                headers={"Retry-After": "1"},
+            )
+        output = JOB_DIR / f"{job_id}.docx"
+        job = Job(
+            id=job_id,
+            future=_get_executor().submit(
+                _run_job, template, template_id, worksheet, output
+            ),
+            output=output,
+            filename=filename,
+            submitted=time.time(),
+        )
+        _jobs[job_id] = job
+        finished = [old for old in _jobs.values() if old.future.done()]
+        for old in finished[: max(0, len(finished) - _JOB_HISTORY)]:
+            del _jobs[old.id]
+            old.output.unlink(missing_ok=True)
+    return job
+
+
+def _get_job(job_id: str) -> Job:
+    """Return the job ``job_id``.
+
+    Raises:
+        HTTPException: 404 if there is no such job.
+    """
+
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+# Most worksheets and total worksheet bytes accepted by one batch request.
+MAX_BATCH_FILES = 500
+MAX_BATCH_SIZE = 20 * MAX_SIZE
+
+
+def _fill_batch_item(
+    template_id: str, name: str, worksheet: bytes
+) -> tuple[Optional[bytes], BatchResult]:
+    """Fill one batch worksheet in memory.
+
+    Returns:
+        The filled document's bytes, or ``None`` on failure, and its result.
+    """
+
+    try:
+        reject_macros(worksheet)
+    except ValueError as exc:
+        return None, BatchResult(
+            worksheet=Path(name), error_code=error_code(exc), error=str(exc)
+        )
+    return process_worksheet_data(
+        _registered_template(template_id), Path(name), worksheet
+    )
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only stream that hands back what a ``ZipFile`` wrote to it.
+
+    It cannot seek, so ``zipfile`` writes each entry once, followed by a data
+    descriptor, and the archive can be sent while it is being built.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last call."""
+
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _archive_name(filename: Optional[str], taken: set[str]) -> str:
+    """Return a safe ``.docx`` entry name for ``filename`` not yet in ``taken``."""
+
+    stem = re.sub(r"[^\w.-]", "_", Path(filename or "").stem) or "document"
+    name = f"{stem}.docx"
+    counter = 2
+    while name in taken or name == BatchArchive.INDEX_NAME:
+        name = f"{stem}_{counter}.docx"
+        counter += 1
+    taken.add(name)
+    return name
+
+
+async def _stream_batch(
+    template_id: str, worksheets: Sequence[UploadFile]
+) -> AsyncIterator[bytes]:
+    """Fill ``worksheets`` in the generation pool and stream a ZIP of results.
+
+    At most :attr:`Settings.workers` fills of one request are in flight, so a
+    batch shares the pool with other requests and holds few finished outputs
+    while it waits for a slow one. A worksheet stays in its spooled upload
+    until its fill is submitted and is closed once it has been read, so only
+    the worksheets in flight are held in memory. Outputs are added in request
+    order. The archive ends with a ``results.jsonl`` manifest holding one
+    :meth:`~scdocbuilder.batch.BatchResult.to_record` per worksheet, in the
+    same format as the CLI's ``--archive`` index.
+    """
+
+    uploads = iter(worksheets)
+    fills: Deque[tuple[str, asyncio.Future[Any]]] = deque()
+
+    async def top_up() -> None:
+        while len(fills) < settings.workers:
+            upload = next(uploads, None)
+            if upload is None:
+                return
+            name = upload.filename or "worksheet.docx"
+            try:
+                data = await _read_upload(upload)
+            finally:
+                await upload.close()
+            fill = run_in_pool(_fill_batch_item, template_id, name, data)
+            fills.append((name, asyncio.ensure_future(fill)))
+
+    sink = _ZipSink()
+    taken: set[str] = set()
+    records = []
+    try:
+        with zipfile.ZipFile(cast(IO[bytes], sink), "w", zipfile.ZIP_STORED) as archive:
+            await top_up()
+            while fills:
+                name, fill = fills.popleft()
+                try:
+                    data, result = await fill
+                except Exception as exc:
+                    data = None
+                    result = BatchResult(
+                        worksheet=Path(name), error_code=error_code(exc), error=str(exc)
+                    )
+                await top_up()
+                if data is not None:
+                    result.output = Path(_archive_name(name, taken))
+                    archive.writestr(result.output.as_posix(), data)
+                    yield sink.drain()
+                records.append(result.to_record())
+            archive.writestr(
+                BatchArchive.INDEX_NAME,
+                "".join(json.dumps(record) + "\n" for record in records),
+            )
+        yield sink.drain()
+    finally:
+        for _, fill in fills:
+            fill.cancel()
+
+
+def _download_name(upload: UploadFile) -> str:
+    """Return a safe, timestamped ``.docx`` filename based on ``upload``."""
+
+    stem = re.sub(r"[^\w.-]", "_", Path(upload.filename or "").stem) or "document"
+    return f"{stem}_{datetime.now():%Y%m%d_%H%M%S}.docx"
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Room for multipart boundaries and part headers around the two uploads.
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large(what: str, limit: int = MAX_SIZE) -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"{what} exceeds {limit // (1024 * 1024)} MB"
+    )
+
+
+# Upload endpoints and the most body a request to each may send: their
+# uploads plus room for multipart boundaries and headers.
+_UPLOAD_LIMITS = {
+    "/generate": 2 * MAX_SIZE + _MULTIPART_OVERHEAD,
+    "/web-generate": 2 * MAX_SIZE + _MULTIPART_OVERHEAD,
+    "/templates": MAX_SIZE + _MULTIPART_OVERHEAD,
+    "/jobs": 2 * MAX_SIZE + _MULTIPART_OVERHEAD,
+    "/generate-batch": MAX_SIZE + MAX_BATCH_SIZE + _MULTIPART_OVERHEAD,
+}
+_REGISTERED_GENERATE = re.compile(r"/templates/[^/]+/generate")
+
+
+def _upload_limit(path: str) -> Optional[int]:
+    """Return the body size limit for requests to ``path``, if any."""
+
+    if _REGISTERED_GENERATE.fullmatch(path):
+        return MAX_SIZE + _MULTIPART_OVERHEAD
+    return _UPLOAD_LIMITS.get(path)
+
+
+class _UploadLimitMiddleware:
+    """Cut off request bodies to upload endpoints once they pass the limit.
+
+    FastAPI receives and parses a whole form body before the endpoint or any
+    route dependency runs, so the limit is enforced here, at the ASGI level.
+    A declared ``Content-Length`` over the limit is refused before the body
+    is read. Otherwise, including for chunked requests, the bytes received
+    are counted and the request fails with 413 as soon as they pass the
+    limit.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = _upload_limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        declared = Headers(scope=scope).get("content-length", "")
+        if declared.isdigit() and int(declared) > limit:
+            error = _too_large("Request body", limit)
+            response = JSONResponse(
+                {"detail": error.detail}, status_code=error.status_code
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPExceptions from body parsing.
+                    raise _too_large("Request body", limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def _read_upload(upload: UploadFile) -> bytes:
+    """Read ``upload`` into memory and check it against the size limit.
+
+    The request body has already been received by the time an endpoint
+    runs; :class:`_UploadLimitMiddleware` bounds the request as a whole
+    while it arrives. This check applies the per-file limit of
+    :data:`~scdocbuilder.io.MAX_SIZE`, reading in :data:`UPLOAD_CHUNK_SIZE`
+    chunks.
+
+    Raises:
+        HTTPException: 413 if the upload is larger than ``MAX_SIZE``.
+    """
+
+    name = upload.filename or "upload"
+    if upload.size is not None and upload.size > MAX_SIZE:
+        raise _too_large(name)
+    data = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        data += chunk
+        if len(data) > MAX_SIZE:
+            raise _too_large(name)
+    return bytes(data)
+
+
+def _upload_size(upload: UploadFile) -> int:
+    """Return the size of the received ``upload`` without reading it."""
+
+    if upload.size is not None:
+        return upload.size
+    position = upload.file.tell()
+    size = upload.file.seek(0, os.SEEK_END)
+    upload.file.seek(position)
+    return size
+
+
+app = FastAPI(lifespan=_lifespan)
 
 app.mount("/files", StaticFiles(directory=str(OUTPUT_DIR)), name="files")
 
@@ -52,15 +738,13 @@ async def web_generate(template: UploadFile, worksheet: UploadFile) -> HTMLRespo
     Returns:
         HTML page with a download link for the generated document.
     """
-    template_path = OUTPUT_DIR / f"{uuid4().hex}_template.docx"
-    worksheet_path = OUTPUT_DIR / f"{uuid4().hex}_worksheet.docx"
-    template_path.write_bytes(await template.read())
-    worksheet_path.write_bytes(await worksheet.read())
-    reject_macros(template_path)
-    reject_macros(worksheet_path)
-    output = fill_template(template_path, worksheet_path)
+    output = await run_in_pool(
+        _fill_uploads,
+        await _read_upload(template),
+        await _read_upload(worksheet),
+        OUTPUT_DIR / f"{uuid4().hex}_{_download_name(template)}",
+    )
     href = f"/files/{output.name}"
-    cleanup_uploads(template_path, worksheet_path)
     return HTMLResponse(f"<a href='{href}'>Download result</a>")
 
 
@@ -75,22 +759,190 @@ async def generate(
         html: When ``True`` return sanitized HTML instead of DOCX.
 
     Returns:
-        FileResponse with DOCX or HTMLResponse.
-    """
-    template_path = OUTPUT_DIR / f"{uuid4().hex}_template.docx"
-    worksheet_path = OUTPUT_DIR / f"{uuid4().hex}_worksheet.docx"
-    template_path.write_bytes(await template.read())
-    worksheet_path.write_bytes(await worksheet.read())
-    reject_macros(template_path)
-    reject_macros(worksheet_path)
-    output = fill_template(template_path, worksheet_path)
+        DOCX attachment or HTMLResponse.
+    """
+    template_data = await _read_upload(template)
+    worksheet_data = await _read_upload(worksheet)
     if html:
-        doc = load_document(output)
-        html_str = export_html(doc)
-        cleanup_uploads(template_path, worksheet_path, output)
-        return HTMLResponse(html_str)
-    cleanup_uploads(template_path, worksheet_path)
-    return FileResponse(output, filename=output.name)
+        return HTMLResponse(
+            await run_in_pool(_fill_uploads_html, template_data, worksheet_data)
+        )
+    data = await run_in_pool(_fill_uploads, template_data, worksheet_data)
+    disposition = f'attachment; filename="{_download_name(template)}"'
+    return Response(
+        data, media_type=DOCX_MIME, headers={"Content-Disposition": disposition}
+    )
+
+
+async def register_template(template: UploadFile) -> dict[str, Any]:
+    """Store a template for later generation requests.
+
+    Args:
+        template: DOCX template file.
+
+    Returns:
+        The template ID to pass to :func:`generate_registered`.
+    """
+    data = await _read_upload(template)
+    try:
+        template_id = await run_in_pool(_register_template, data)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"id": template_id, "size": len(data)}
+
+
+def template_info(template_id: str) -> dict[str, Any]:
+    """Report whether a template is registered.
+
+    Raises:
+        HTTPException: 404 if no template is registered under ``template_id``.
+    """
+    try:
+        size = _template_file(template_id).stat().st_size
+    except (KeyError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Unknown template") from None
+    return {"id": template_id, "size": size}
+
+
+async def generate_registered(
+    template_id: str, worksheet: UploadFile, html: bool = False
+) -> Response:
+    """Generate DOCX or HTML from a registered template and an uploaded worksheet.
+
+    Args:
+        template_id: ID returned by :func:`register_template`.
+        worksheet: DOCX worksheet file.
+        html: When ``True`` return sanitized HTML instead of DOCX.
+
+    Returns:
+        DOCX attachment or HTMLResponse.
+    """
+    worksheet_data = await _read_upload(worksheet)
+    try:
+        if html:
+            return HTMLResponse(
+                await run_in_pool(_fill_registered_html, template_id, worksheet_data)
+            )
+        data = await run_in_pool(_fill_registered, template_id, worksheet_data)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown template") from None
+    disposition = f'attachment; filename="{_download_name(worksheet)}"'
+    return Response(
+        data, media_type=DOCX_MIME, headers={"Content-Disposition": disposition}
+    )
+
+
+async def submit_job(
+    worksheet: UploadFile,
+    template: Optional[UploadFile] = None,
+    template_id: Optional[str] = None,
+) -> JSONResponse:
+    """Queue document generation and return its job ID right away.
+
+    Args:
+        worksheet: DOCX worksheet file.
+        template: DOCX template file, unless ``template_id`` is given.
+        template_id: ID of a template stored with :func:`register_template`.
+
+    Returns:
+        ``202 Accepted`` with the job record; poll ``/jobs/{id}`` for status.
+
+    Raises:
+        HTTPException: 400 without a template, 404 for an unknown
+            ``template_id`` and 503 when the job queue is full.
+    """
+    if (template is None) == (template_id is None):
+        raise HTTPException(
+            status_code=400, detail="Send either a template or a template_id"
+        )
+    if template_id is not None:
+        template_info(template_id)
+    template_data = None if template is None else await _read_upload(template)
+    job = _submit_job(
+        template_data,
+        template_id,
+        await _read_upload(worksheet),
+        _download_name(template or worksheet),
+    )
+    return JSONResponse(job.to_record(), status_code=202)
+
+
+def job_status(job_id: str) -> dict[str, Any]:
+    """Report a job's status and timings.
+
+    Raises:
+        HTTPException: 404 if there is no such job.
+    """
+    return _get_job(job_id).to_record()
+
+
+def job_result(job_id: str) -> FileResponse:
+    """Download the document produced by a finished job.
+
+    Raises:
+        HTTPException: 404 if there is no such job and 409 if it is not done.
+    """
+    job = _get_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return FileResponse(job.output, media_type=DOCX_MIME, filename=job.filename)
+
+
+async def generate_batch(
+    worksheets: list[UploadFile],
+    template: Optional[UploadFile] = None,
+    template_id: Optional[str] = None,
+) -> StreamingResponse:
+    """Fill one template with many worksheets and stream back a ZIP.
+
+    An uploaded template is registered like :func:`register_template`, so it
+    is parsed once per worker and can be reused by ID afterwards. The
+    worksheets are checked against the size limits up front but read only
+    as their fills are submitted.
+
+    Args:
+        worksheets: DOCX worksheet files.
+        template: DOCX template file, unless ``template_id`` is given.
+        template_id: ID of a template stored with :func:`register_template`.
+
+    Returns:
+        ZIP attachment with one DOCX per successful worksheet and a
+        ``results.jsonl`` manifest with a status record per worksheet.
+
+    Raises:
+        HTTPException: 400 without a template, for an invalid template or
+            too many worksheets, 404 for an unknown ``template_id`` and 413
+            when a worksheet exceeds ``MAX_SIZE`` or the worksheets exceed
+            ``MAX_BATCH_SIZE`` together.
+    """
+    if (template is None) == (template_id is None):
+        raise HTTPException(
+            status_code=400, detail="Send either a template or a template_id"
+        )
+    if len(worksheets) > MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_FILES} worksheets"
+        )
+    if template is not None:
+        template_id = (await register_template(template))["id"]
+    else:
+        template_info(cast(str, template_id))
+    total = 0
+    for upload in worksheets:
+        size = _upload_size(upload)
+        if size > MAX_SIZE:
+            raise _too_large(upload.filename or "upload")
+        total += size
+        if total > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Worksheets exceed {MAX_BATCH_SIZE // (1024 * 1024)} MB",
+            )
+    return StreamingResponse(
+        _stream_batch(cast(str, template_id), worksheets),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="documents.zip"'},
+    )
 
 
 def health() -> dict[str, str]:
@@ -99,6 +951,14 @@ def health() -> dict[str, str]:
 
 
 app.get("/", response_class=HTMLResponse)(index)
+app.add_middleware(_UploadLimitMiddleware)
 app.post("/web-generate", response_class=HTMLResponse)(web_generate)
 app.post("/generate")(generate)
+app.post("/templates")(register_template)
+app.get("/templates/{template_id}")(template_info)
+app.post("/templates/{template_id}/generate")(generate_registered)
+app.post("/generate-batch")(generate_batch)
+app.post("/jobs", status_code=202)(submit_job)
+app.get("/jobs/{job_id}")(job_status)
+app.get("/jobs/{job_id}/result")(job_result)
 app.get("/health")(health)
@@ -0,0 +1,883 @@
+"""Batch processing of many worksheets against one template."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Deque,
+    Dict,
+    Generator,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from . import PreparedTemplate, prepare_template
+from .io import DocxSource, clone_document, read_worksheet, save_document
+from .processing import diff_compiled, extract_fields, fill_compiled
+from .validation import validate_mandatory_fields
+
+
+class ErrorCode(IntEnum):
+    """Numeric exit codes for common error categories."""
+
+    OK = 0
+    ENOFILE = 1
+    EVALID = 2
+    EREPLACE = 3
+
+
+def error_code(exc: BaseException) -> ErrorCode:
+    """Return the :class:`ErrorCode` category for ``exc``."""
+
+    if isinstance(exc, FileNotFoundError):
+        return ErrorCode.ENOFILE
+    if isinstance(exc, ValueError):
+        return ErrorCode.EVALID
+    return ErrorCode.EREPLACE
+
+
+# Word lock files (``~$name.docx``) are never worksheets.
+_LOCK_FILE = re.compile(r"^~\$")
+# Names batch runs give their outputs: ``<stem>_YYYYmmdd_HHMMSS.docx``.
+_OUTPUT_NAME = re.compile(r"_\d{8}_\d{6}\.docx$", re.IGNORECASE)
+
+
+def discover_worksheets(
+    batch_dir: Path,
+    *,
+    recursive: bool = False,
+    exclude: Optional[Path] = None,
+    shard: Tuple[int, int] = (1, 1),
+    known_outputs: Collection[Path] = (),
+    skipped: Optional[set[Path]] = None,
+) -> list[Path]:
+    """Return a sorted snapshot of the worksheets in ``batch_dir``.
+
+    The directory is listed once up front so files written while the batch
+    runs are never picked up. Shards are assigned from a hash of each path
+    relative to ``batch_dir``, so every machine computes the same disjoint
+    split of a shared directory.
+
+    Word lock files are skipped. When ``exclude`` is ``batch_dir`` itself,
+    outputs land beside the worksheets, so ``known_outputs`` are skipped and
+    so is any other file named like an output
+    (``<stem>_YYYYmmdd_HHMMSS.docx``). Every file skipped by name is logged
+    as a warning.
+
+    Args:
+        batch_dir: Directory to scan for ``.docx`` files.
+        recursive: Also scan subdirectories.
+        exclude: The output directory. Its contents are skipped when it lies
+            inside ``batch_dir``.
+        shard: ``(index, count)`` with ``1 <= index <= count``; only
+            worksheets in that shard are returned.
+        known_outputs: Files earlier runs are known to have written, such as
+            the outputs recorded in a manifest or journal.
+        skipped: Files already reported as skipped. Newly skipped files are
+            added to it and each is only logged the first time.
+
+    Returns:
+        Worksheet paths sorted by their path relative to ``batch_dir``.
+
+    Raises:
+        ValueError: If ``shard`` is out of range.
+    """
+
+    index, count = shard
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {index}/{count}")
+    pattern = "**/*.docx" if recursive else "*.docx"
+    excluded = exclude.resolve() if exclude else None
+    beside = excluded == batch_dir.resolve()
+    known = {path.resolve() for path in known_outputs}
+    reported = skipped if skipped is not None else set()
+    worksheets = []
+    for path in batch_dir.glob(pattern):
+        if not path.is_file():
+            continue
+        if excluded and not beside and excluded in path.resolve().parents:
+            continue
+        reason = None
+        if _LOCK_FILE.search(path.name):
+            reason = "a Word lock file"
+        elif path.resolve() in known:
+            reason = "a recorded output"
+        elif beside and _OUTPUT_NAME.search(path.name):
+            reason = "named like an output"
+        if reason:
+            if path not in reported:
+                reported.add(path)
+                logging.warning("Skipping %s: %s", path, reason)
+            continue
+        rel = path.relative_to(batch_dir).as_posix()
+        if zlib.crc32(rel.encode("utf-8")) % count != index - 1:
+            continue
+        worksheets.append((rel, path))
+    return [path for _, path in sorted(worksheets)]
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    """One worksheet to fill.
+
+    Attributes:
+        worksheet: Worksheet ``.docx`` to read answers from.
+        output: Where the filled document is written.
+        dry_run: Only extract the answers and report the changes they would
+            make, without filling or saving ``output``.
+    """
+
+    worksheet: Path
+    output: Path
+    dry_run: bool = False
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a :class:`BatchTask`.
+
+    Attributes:
+        worksheet: Worksheet the task read.
+        output: Saved document, or ``None`` on failure or in a dry run.
+        error_code: :class:`ErrorCode` of the failure, ``OK`` on success.
+        error: Failure message.
+        values: Extracted placeholder values.
+        timings: Seconds spent in each stage, keyed by stage name.
+        skipped: Whether an up-to-date ``output`` was reused.
+        diff: Changes a dry run would make, from
+            :func:`~scdocbuilder.processing.diff_compiled`.
+    """
+
+    worksheet: Path
+    output: Optional[Path] = None
+    error_code: ErrorCode = ErrorCode.OK
+    error: str = ""
+    values: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    skipped: bool = False
+    diff: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the task succeeded."""
+        return self.error_code == ErrorCode.OK
+
+    def to_record(self) -> dict[str, Any]:
+        """Return a JSON-serializable summary of the result.
+
+        Returns:
+            Mapping with the worksheet ``input``, ``output`` path, ``status``,
+            numeric ``error_code``, ``error`` message, extracted ``fields``
+            count and per-stage ``timings`` in seconds. A dry run's ``diff``
+            is included when it found placeholders.
+        """
+
+        record: dict[str, Any] = {
+            "input": str(self.worksheet),
+            "output": str(self.output) if self.output else None,
+            "status": "skipped" if self.skipped else "ok" if self.ok else "error",
+            "error_code": int(self.error_code),
+            "error": self.error,
+            "fields": len(self.values),
+            "timings": {k: round(v, 6) for k, v in self.timings.items()},
+        }
+        if self.diff:
+            record["diff"] = self.diff
+        return record
+
+
+def process_worksheet(
+    prepared: PreparedTemplate,
+    task: BatchTask,
+    schema: Optional[dict[str, str]] = None,
+) -> BatchResult:
+    """Fill a clone of ``prepared`` with the answers of ``task.worksheet``.
+
+    Failures are captured in the returned result instead of being raised so
+    one bad worksheet can be reported without losing the rest of the batch.
+
+    Args:
+        prepared: Template from :func:`~scdocbuilder.prepare_template`.
+        task: Worksheet and output location.
+        schema: Optional placeholder mapping used to read the worksheet.
+
+    Returns:
+        Result describing the output or the failure.
+    """
+
+    result = BatchResult(worksheet=task.worksheet)
+    try:
+        _extract(task.worksheet, result, schema)
+        if task.dry_run:
+            start = perf_counter()
+            result.diff = diff_compiled(prepared.compiled, result.values)
+            result.timings["scan"] = perf_counter() - start
+        else:
+            doc = _fill_clone(prepared, result)
+            start = perf_counter()
+            task.output.parent.mkdir(parents=True, exist_ok=True)
+            save_document(doc, task.output, only_modified=True)
+            result.timings["save"] = perf_counter() - start
+            result.output = task.output
+    except Exception as exc:
+        result.error_code = error_code(exc)
+        result.error = str(exc)
+    return result
+
+
+def process_worksheet_data(
+    prepared: PreparedTemplate, worksheet: Path, data: bytes
+) -> tuple[Optional[bytes], BatchResult]:
+    """Fill a clone of ``prepared`` with the answers of a worksheet in memory.
+
+    Like :func:`process_worksheet`, but nothing touches the disk: the
+    worksheet is read from ``data`` and the filled document is returned.
+    The worksheet is read with the schema ``prepared`` was compiled with.
+
+    Args:
+        prepared: Template from :func:`~scdocbuilder.prepare_template`.
+        worksheet: Name of the worksheet, reported in the result.
+        data: Worksheet ``.docx`` bytes.
+
+    Returns:
+        The filled document's bytes, or ``None`` on failure, and the result.
+        The result's ``output`` is left for the caller to set.
+    """
+
+    result = BatchResult(worksheet=worksheet)
+    try:
+        _extract(data, result, prepared.schema)
+        doc = _fill_clone(prepared, result)
+        start = perf_counter()
+        filled = save_document(doc, only_modified=True)
+        result.timings["save"] = perf_counter() - start
+    except Exception as exc:
+        result.error_code = error_code(exc)
+        result.error = str(exc)
+        return None, result
+    return filled, result
+
+
+def _extract(
+    source: DocxSource, result: BatchResult, schema: Optional[dict[str, str]]
+) -> None:
+    """Validate the worksheet ``source`` and store its answers in ``result``."""
+
+    start = perf_counter()
+    text = read_worksheet(source)
+    validate_mandatory_fields(text)
+    result.values = extract_fields(text, schema)
+    result.timings["extract"] = perf_counter() - start
+
+
+def _fill_clone(prepared: PreparedTemplate, result: BatchResult) -> Any:
+    """Return a clone of ``prepared`` filled with ``result.values``."""
+
+    start = perf_counter()
+    doc = clone_document(prepared.document)
+    fill_compiled(doc, prepared.compiled, result.values)
+    result.timings["fill"] = perf_counter() - start
+    return doc
+
+
+def _file_hash(path: Path) -> str:
+    """Return the SHA-256 hex digest of ``path``'s contents."""
+
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _schema_hash(schema: Optional[dict[str, str]]) -> str:
+    """Return the SHA-256 hex digest of ``schema`` in canonical JSON form."""
+
+    canonical = json.dumps(schema, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest()
+
+
+def _shard_filename(name: str, shard: Tuple[int, int]) -> str:
+    """Return ``name`` keyed by ``shard`` ``(i, N)``.
+
+    Shards that share an output folder then never write the same file. An
+    unsharded run keeps ``name`` unchanged.
+    """
+
+    index, count = shard
+    if count == 1:
+        return name
+    path = Path(name)
+    return f"{path.stem}-{index}of{count}{path.suffix}"
+
+
+class BatchManifest:
+    """Content hashes of the inputs behind each batch output.
+
+    The manifest lives in the output directory as a JSON file mapping each
+    worksheet path to the hashes of the template, worksheet and schema that
+    produced its output. A worksheet whose hashes match and whose output still
+    exists does not need to be processed again.
+    """
+
+    FILENAME = ".scdocbuilder-manifest.json"
+
+    @classmethod
+    def filename(cls, shard: Tuple[int, int] = (1, 1)) -> str:
+        """Return the manifest file name for ``shard`` ``(i, N)``."""
+
+        return _shard_filename(cls.FILENAME, shard)
+
+    def __init__(
+        self,
+        path: Path,
+        template: Path,
+        schema: Optional[dict[str, str]] = None,
+    ) -> None:
+        """Load the manifest at ``path`` for a run of ``template``.
+
+        Args:
+            path: Manifest file; a missing or unreadable file starts empty.
+            template: Template ``.docx`` of the current run.
+            schema: Placeholder mapping of the current run.
+        """
+
+        self.path = path
+        self.template_hash = _file_hash(template)
+        self.schema_hash = _schema_hash(schema)
+        try:
+            entries = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entries = {}
+        self.entries: dict[str, dict[str, str]] = (
+            entries if isinstance(entries, dict) else {}
+        )
+        # Worksheet hash by path, with the size and modification time it was
+        # taken at, so a file replaced while the manifest is open is rehashed.
+        self._hashes: dict[str, tuple[tuple[int, int], str]] = {}
+
+    def _key(self, worksheet: Path) -> str:
+        return str(worksheet.resolve())
+
+    def _worksheet_hash(self, worksheet: Path) -> str:
+        key = self._key(worksheet)
+        stat = worksheet.stat()
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        cached = self._hashes.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = self._hashes[key] = (stamp, _file_hash(worksheet))
+        return cached[1]
+
+    def current_output(self, task: BatchTask) -> Optional[Path]:
+        """Return the existing output for ``task`` if its inputs are unchanged.
+
+        Args:
+            task: Task about to be processed.
+
+        Returns:
+            Path of the up-to-date output, or ``None`` if ``task`` must run.
+        """
+
+        entry = self.entries.get(self._key(task.worksheet))
+        if not entry:
+            return None
+        output = Path(entry.get("output", ""))
+        if (
+            entry.get("template") != self.template_hash
+            or entry.get("schema") != self.schema_hash
+            or not output.is_file()
+        ):
+            return None
+        try:
+            worksheet_hash = self._worksheet_hash(task.worksheet)
+        except OSError:
+            return None
+        return output if entry.get("worksheet") == worksheet_hash else None
+
+    def outputs(self) -> set[Path]:
+        """Return the outputs recorded in the manifest."""
+
+        return {
+            Path(entry["output"])
+            for entry in self.entries.values()
+            if isinstance(entry, dict) and entry.get("output")
+        }
+
+    def record(self, result: BatchResult) -> None:
+        """Remember the inputs of a successful, saved ``result``."""
+
+        if not result.ok or result.output is None:
+            return
+        self.entries[self._key(result.worksheet)] = {
+            "template": self.template_hash,
+            "worksheet": self._worksheet_hash(result.worksheet),
+            "schema": self.schema_hash,
+            "output": str(result.output),
+        }
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(
+            json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8"
+        )
+        os.replace(tmp, self.path)
+
+
+class BatchJournal:
+    """Append-only record of the worksheets a batch run has completed.
+
+    The first line of the journal identifies the template and schema of the
+    run. Every following line names a worksheet and its output, and is
+    flushed as soon as that worksheet is done, so a killed run loses at most
+    the results it had not yet received.
+    """
+
+    FILENAME = ".scdocbuilder-journal.jsonl"
+
+    @classmethod
+    def filename(cls, shard: Tuple[int, int] = (1, 1)) -> str:
+        """Return the journal file name for ``shard`` ``(i, N)``."""
+
+        return _shard_filename(cls.FILENAME, shard)
+
+    def __init__(
+        self,
+        path: Path,
+        template: Path,
+        schema: Optional[dict[str, str]] = None,
+        resume: bool = False,
+    ) -> None:
+        """Open the journal at ``path``.
+
+        Args:
+            path: Journal file.
+            template: Template ``.docx`` of the current run.
+            schema: Placeholder mapping of the current run.
+            resume: Continue an existing journal written for the same template
+                and schema. Otherwise, or if it belongs to another run, the
+                journal starts over.
+        """
+
+        self.path = path
+        header = {"template": _file_hash(template), "schema": _schema_hash(schema)}
+        self.done: dict[str, Path] = {}
+        resumed = resume and self._load(header)
+        self._fh = path.open("a" if resumed else "w", encoding="utf-8")
+        if not resumed:
+            self._append(header)
+        elif self._partial:
+            self._fh.write("\n")
+
+    def _load(self, header: dict[str, str]) -> bool:
+        """Read completed worksheets if the journal at ``path`` matches."""
+
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except OSError:
+            return False
+        self._partial = not text.endswith("\n")
+        entries = []
+        lines = text.splitlines()
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut short by a crash
+        if not entries or entries[0] != header:
+            return False
+        for entry in entries[1:]:
+            if isinstance(entry, dict) and "worksheet" in entry:
+                self.done[entry["worksheet"]] = Path(entry["output"])
+        return True
+
+    def _append(self, entry: dict[str, str]) -> None:
+        self._fh.write(json.dumps(entry) + "\n")
+        self._fh.flush()
+
+    def current_output(self, task: BatchTask) -> Optional[Path]:
+        """Return the output journaled for ``task`` if it still exists."""
+
+        output = self.done.get(str(task.worksheet.resolve()))
+        return output if output is not None and output.is_file() else None
+
+    def outputs(self) -> set[Path]:
+        """Return the outputs journaled so far."""
+
+        return set(self.done.values())
+
+    def record(self, result: BatchResult) -> None:
+        """Append a successful, saved ``result`` to the journal."""
+
+        if not result.ok or result.output is None:
+            return
+        worksheet = str(result.worksheet.resolve())
+        self.done[worksheet] = result.output
+        self._append({"worksheet": worksheet, "output": str(result.output)})
+
+    def close(self) -> None:
+        """Close the journal file."""
+
+        self._fh.close()
+
+
+class BatchArchive:
+    """ZIP archive that collects batch outputs as they are produced.
+
+    Each saved output is streamed from disk into the archive and then deleted,
+    so memory use does not grow with the number of documents. The ``.docx``
+    files are already compressed and are stored without recompression.
+    """
+
+    INDEX_NAME = "results.jsonl"
+
+    def __init__(self, path: Path, root: Path, index: bool = False) -> None:
+        """Create the archive at ``path``.
+
+        Args:
+            path: Destination ``.zip`` file.
+            root: Directory the outputs are saved under; member names are
+                relative to it.
+            index: Also store each result record in :attr:`INDEX_NAME`.
+        """
+
+        self.path = path
+        self.root = root
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+        self._index = tempfile.TemporaryFile("w+", encoding="utf-8") if index else None
+
+    def add(self, result: BatchResult) -> None:
+        """Move ``result.output`` into the archive.
+
+        On success ``result.output`` is replaced by the member name. The
+        result record is appended to the index either way.
+        """
+
+        if result.output is not None:
+            arcname = result.output.relative_to(self.root).as_posix()
+            self._zip.write(result.output, arcname)
+            result.output.unlink()
+            result.output = Path(arcname)
+        if self._index:
+            self._index.write(json.dumps(result.to_record()) + "\n")
+
+    def close(self) -> None:
+        """Write the index, if any, and finish the archive."""
+
+        if self._index:
+            self._index.seek(0)
+            with self._zip.open(self.INDEX_NAME, "w") as member:
+                for line in self._index:
+                    member.write(line.encode("utf-8"))
+            self._index.close()
+        self._zip.close()
+
+
+# Template each pool worker prepares once in :func:`_init_worker`.
+_worker_state: dict[str, Any] = {}
+
+
+def _init_worker(template: Path, schema: Optional[dict[str, str]]) -> None:
+    """Prepare the batch template once per worker process."""
+
+    _worker_state["prepared"] = prepare_template(template, schema)
+    _worker_state["schema"] = schema
+
+
+def _run_in_worker(task: BatchTask) -> BatchResult:
+    """Process ``task`` with the template prepared for this worker."""
+
+    return process_worksheet(_worker_state["prepared"], task, _worker_state["schema"])
+
+
+# Rough ratio of the memory a parsed lxml tree takes to the size of its XML.
+_PARSED_XML_FACTOR = 6
+
+
+def estimate_footprint(path: Path) -> int:
+    """Estimate the bytes needed to hold ``path`` as a parsed document.
+
+    The estimate is the file size plus the uncompressed size of its XML
+    members, scaled by the typical overhead of a parsed tree. Only the ZIP
+    central directory is read.
+
+    Args:
+        path: ``.docx`` file to estimate.
+
+    Returns:
+        Estimated footprint in bytes; just the file size if ``path`` is not a
+        readable ZIP archive.
+    """
+
+    try:
+        size = path.stat().st_size
+        with zipfile.ZipFile(path) as zf:
+            xml = sum(
+                info.file_size
+                for info in zf.infolist()
+                if info.filename.endswith((".xml", ".rels"))
+            )
+    except (OSError, zipfile.BadZipFile):
+        return path.stat().st_size if path.exists() else 0
+    return size + xml * _PARSED_XML_FACTOR
+
+
+@dataclass
+class _Slot:
+    """A task's place in the ordered output of :func:`_schedule`."""
+
+    task: BatchTask
+    footprint: int
+    future: Optional[Future[BatchResult]] = None
+    # Rerun alone after its pool broke, to tell a crashing task from the
+    # tasks that merely shared the pool with it.
+    isolated: bool = False
+    result: Optional[BatchResult] = None
+
+
+def _broke(future: Optional[Future[BatchResult]]) -> bool:
+    """Whether ``future`` failed because its process pool broke."""
+
+    return (
+        future is not None
+        and future.done()
+        and not future.cancelled()
+        and isinstance(future.exception(), BrokenProcessPool)
+    )
+
+
+def _failed(task: BatchTask, error: str) -> BatchResult:
+    return BatchResult(
+        worksheet=task.worksheet, error_code=ErrorCode.EREPLACE, error=error
+    )
+
+
+def _schedule(
+    new_executor: Callable[[], ProcessPoolExecutor],
+    tasks: Sequence[BatchTask],
+    jobs: int,
+    budget: Optional[int],
+    resident: int,
+    cost: int,
+) -> Generator[BatchResult, None, None]:
+    """Run ``tasks`` in a process pool and yield their results in order.
+
+    At most ``jobs`` tasks are in flight. With a ``budget`` a task is only
+    admitted while ``resident`` plus the estimated footprint of the running
+    tasks (``cost`` each, plus their worksheet) stays within it. One task is
+    always admitted so an oversized worksheet still runs, alone.
+
+    A worker that dies, e.g. killed for running out of memory, breaks the
+    pool and fails every task in flight. The pool is then recreated and each
+    of those tasks is rerun on its own; one that breaks the pool again gets
+    an ``EREPLACE`` result, and the rest of the batch carries on.
+    """
+
+    executor = new_executor()
+    remaining = iter(tasks)
+    slots: Deque[_Slot] = deque()
+    upcoming: Optional[_Slot] = None
+    # ``submit`` itself raises once a dead worker has been noticed.
+    submit_failed = False
+
+    def submit(slot: _Slot) -> bool:
+        nonlocal submit_failed
+        try:
+            slot.future = executor.submit(_run_in_worker, slot.task)
+        except BrokenProcessPool:
+            submit_failed = True
+            return False
+        return True
+
+    try:
+        while True:
+            running = [slot for slot in slots if slot.future and not slot.future.done()]
+            if submit_failed or any(_broke(slot.future) for slot in slots):
+                submit_failed = False
+                executor.shutdown(wait=True, cancel_futures=True)
+                executor = new_executor()
+                for slot in slots:
+                    future = slot.future
+                    if future is None or not future.done():
+                        continue
+                    if future.cancelled():
+                        slot.future = None
+                    elif _broke(future):
+                        if slot.isolated:
+                            slot.result = _failed(
+                                slot.task, f"Worker crashed: {future.exception()}"
+                            )
+                        slot.future, slot.isolated = None, True
+                continue
+
+            retry = next(
+                (s for s in slots if s.future is None and s.result is None), None
+            )
+            if retry is not None:
+                if not running and submit(retry):
+                    running.append(retry)
+            elif not any(slot.isolated for slot in running):
+                while len(running) < jobs:
+                    if upcoming is None:
+                        task = next(remaining, None)
+                        if task is None:
+                            break
+                        upcoming = _Slot(
+                            task, cost + estimate_footprint(task.worksheet)
+                        )
+                    used = resident + sum(slot.footprint for slot in running)
+                    if (
+                        running
+                        and budget is not None
+                        and used + upcoming.footprint > budget
+                    ):
+                        break
+                    slots.append(upcoming)
+                    if not submit(upcoming):
+                        upcoming = None
+                        break
+                    running.append(upcoming)
+                    upcoming = None
+            if submit_failed:
+                continue
+
+            if not slots:
+                return
+            head = slots[0]
+            if head.result is not None:
+                slots.popleft()
+                yield head.result
+                continue
+            if _broke(head.future):
+                continue  # the pool broke since the check above
+            if head.future is not None and head.future.done():
+                exc = head.future.exception()
+                slots.popleft()
+                if exc is None:
+                    yield head.future.result()
+                else:
+                    yield _failed(head.task, str(exc) or type(exc).__name__)
+                continue
+            wait(
+                [slot.future for slot in running if slot.future],
+                return_when=FIRST_COMPLETED,
+            )
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def run_batch(
+    template: Path,
+    tasks: Sequence[BatchTask],
+    schema: Optional[dict[str, str]] = None,
+    jobs: int = 1,
+    manifest: Optional[BatchManifest] = None,
+    journal: Optional[BatchJournal] = None,
+    max_memory: Optional[int] = None,
+) -> Generator[BatchResult, None, None]:
+    """Process ``tasks`` and yield their results in task order.
+
+    With ``jobs`` greater than one the tasks are spread over a process pool in
+    which each worker parses the template once. Tasks are admitted as
+    workers free up and, with ``max_memory``, only while the estimated
+    footprint of the workers and their running tasks (see
+    :func:`estimate_footprint`) fits the budget. Closing the iterator early
+    cancels tasks that have not started.
+
+    Args:
+        template: Template ``.docx`` every task fills.
+        tasks: Worksheets to process.
+        schema: Optional placeholder mapping.
+        jobs: Maximum number of worker processes.
+        manifest: Skip tasks whose inputs it records as unchanged and record
+            new outputs in it. It is saved when the iterator finishes.
+        journal: Skip tasks it lists as completed and append each new
+            output to it. It is closed when the iterator finishes.
+        max_memory: Memory budget in bytes for the worker processes.
+
+    Yields:
+        One :class:`BatchResult` per task, in the order of ``tasks``.
+
+    Raises:
+        FileNotFoundError: If ``template`` is missing.
+        ValueError: If ``template`` is not a valid ``.docx`` file.
+    """
+
+    # Prepare in this process first so a bad template fails fast instead of
+    # breaking every worker.
+    prepared = prepare_template(template, schema)
+    trackers: list[Union[BatchJournal, BatchManifest]] = []
+    if journal:
+        trackers.append(journal)
+    if manifest:
+        trackers.append(manifest)
+    current: list[Optional[Path]] = []
+    for task in tasks:
+        output = None
+        if not task.dry_run:
+            for tracker in trackers:
+                output = tracker.current_output(task)
+                if output is not None:
+                    break
+        current.append(output)
+    pending = [task for task, output in zip(tasks, current) if output is None]
+
+    processed: Generator[BatchResult, None, None]
+    if jobs <= 1 or len(pending) <= 1:
+        processed = (process_worksheet(prepared, task, schema) for task in pending)
+    else:
+        # Each worker keeps a parsed template; each running task adds a clone
+        # of it and its worksheet.
+        template_size = estimate_footprint(template)
+        workers = min(jobs, len(pending))
+        if max_memory is not None:
+            workers = max(1, min(workers, max_memory // (2 * template_size or 1)))
+        processed = _schedule(
+            partial(
+                ProcessPoolExecutor,
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(template, schema),
+            ),
+            pending,
+            workers,
+            max_memory,
+            resident=workers * template_size,
+            cost=template_size,
+        )
+    try:
+        for task, output in zip(tasks, current):
+            if output is not None:
+                yield BatchResult(worksheet=task.worksheet, output=output, skipped=True)
+                continue
+            result = next(processed)
+            for tracker in trackers:
+                tracker.record(result)
+            yield result
+    finally:
+        processed.close()
+        if manifest:
+            manifest.save()
+        if journal:
+            journal.close()
@@ -5,25 +5,66 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import math
 from logging.handlers import RotatingFileHandler
+import os
 import sys
-from enum import IntEnum
+import tempfile
+from contextlib import ExitStack, closing
 from datetime import datetime
 from pathlib import Path
 
-from . import processing
-from .io import load_document, save_document, validate_input_files
+from . import prepare_template, processing
+from .batch import (
+    BatchArchive,
+    BatchJournal,
+    BatchManifest,
+    BatchResult,
+    BatchTask,
+    ErrorCode,
+    discover_worksheets,
+    run_batch,
+)
+from .io import (
+    load_document,
+    read_worksheet,
+    save_document,
+    validate_input_files,
+)
 from .validation import validate_mandatory_fields
 from .config import load_placeholder_schema
 
 
-class ErrorCode(IntEnum):
-    """Numeric exit codes for common error categories."""
+def _parse_shard(value: str) -> tuple[int, int]:
+    """Parse a ``--shard`` value of the form ``i/N``."""
 
-    OK = 0
-    ENOFILE = 1
-    EVALID = 2
-    EREPLACE = 3
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}") from None
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range")
+    return index, count
+
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def _parse_size(value: str) -> int:
+    """Parse a byte count such as ``512M`` or ``2G``."""
+
+    text = value.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    number = text[: len(text) - len(unit)]
+    try:
+        size = float(number) * _SIZE_UNITS[unit]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {value!r}") from None
+    if not math.isfinite(size):
+        raise argparse.ArgumentTypeError(f"size must be finite, got {value!r}")
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"size must be positive, got {value!r}")
+    return int(size)
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -45,13 +86,69 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         help="Directory containing worksheet .docx files",
     )
     parser.add_argument("--output", help="Output path for processed document")
+    parser.add_argument(
+        "--max-memory",
+        type=_parse_size,
+        default=None,
+        metavar="SIZE",
+        help="Memory budget for --batch workers, e.g. 2G; fewer worksheets "
+        "run at once when it is reached",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="ZIP",
+        help="Write --batch outputs into this ZIP archive instead of --output",
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also read worksheets from subdirectories of --batch",
+    )
+    parser.add_argument(
+        "--shard",
+        type=_parse_shard,
+        default=(1, 1),
+        metavar="i/N",
+        help="Only process shard i of N of the --batch worksheets",
+    )
     parser.add_argument(
         "--schema", help="Path to placeholder schema JSON or YAML", default=None
     )
     parser.add_argument(
-        "--dry-run", action="store_true", help="Print JSON diff without saving"
+        "--dry-run",
+        action="store_true",
+        help="Print the placeholder changes as JSON without filling or saving",
     )
     parser.add_argument("--html-out", help="Save sanitized HTML to this path")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Worker processes for --batch (default: CPU count)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip batch worksheets whose template, worksheet and schema are "
+        "unchanged since their last output",
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Continue a batch after a worksheet fails and exit non-zero at the end",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip batch worksheets the previous run's journal lists as done",
+    )
+    parser.add_argument(
+        "--results",
+        choices=["text", "jsonl"],
+        default="text",
+        help="Batch result format: output paths or one JSON record per line",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -72,9 +169,64 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         parser.error("--template is required")
     if not (args.worksheet or args.batch):
         parser.error("one of --worksheet or --batch is required")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.archive:
+        if not args.batch:
+            parser.error("--archive requires --batch")
+        if args.output or args.incremental or args.resume or args.dry_run:
+            parser.error(
+                "--archive cannot be combined with --output, --incremental, "
+                "--resume or --dry-run"
+            )
+        if not args.archive.lower().endswith(".zip"):
+            parser.error("--archive must end with .zip")
     return args
 
 
+def parse_watch_args(argv: list[str]) -> argparse.Namespace:
+    """Parse the arguments of ``scdocbuilder watch``.
+
+    Args:
+        argv: Arguments following ``watch``.
+
+    Returns:
+        Parsed arguments namespace.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="scdocbuilder watch",
+        description="Fill worksheets as they are dropped into a directory",
+    )
+    parser.add_argument("directory", help="Directory to watch for worksheets")
+    parser.add_argument("--template", required=True, help="Path to template .docx")
+    parser.add_argument(
+        "--output", help="Directory for filled documents (default: watched one)"
+    )
+    parser.add_argument(
+        "--schema", help="Path to placeholder schema JSON or YAML", default=None
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between directory scans",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a worksheet must stay unchanged before it is read",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity",
+    )
+    return parser.parse_args(argv)
+
+
 def _generate_completion(shell: str) -> str:
     """Return a simple shell completion script."""
 
@@ -83,11 +235,21 @@ def _generate_completion(shell: str) -> str:
         "--worksheet",
         "--batch",
         "--output",
+        "--archive",
+        "--recursive",
+        "--shard",
         "--schema",
         "--dry-run",
         "--html-out",
+        "--jobs",
+        "--max-memory",
+        "--incremental",
+        "--keep-going",
+        "--resume",
+        "--results",
         "--log-level",
         "--show-completion",
+        "watch",
     ]
     if shell == "bash":
         opts = " ".join(options)
@@ -95,9 +257,214 @@ def _generate_completion(shell: str) -> str:
     raise ValueError(f"Unsupported shell: {shell}")
 
 
+def _configure_logging(level: str) -> None:
+    """Log to stderr and a rotating ``scdocbuilder.log`` at ``level``."""
+
+    handlers: list[logging.Handler] = [
+        logging.StreamHandler(),
+        RotatingFileHandler(
+            "scdocbuilder.log", maxBytes=5 * 1024 * 1024, backupCount=2
+        ),
+    ]
+    # Preserve any existing handlers (e.g. from tests) while configuring ours
+    existing = logging.getLogger().handlers
+    logging.basicConfig(
+        level=getattr(logging, level),
+        handlers=[*existing, *handlers],
+        force=True,
+    )
+
+
+def _log_failure(code: ErrorCode, message: str) -> None:
+    """Log a processing failure in the structured form for its ``code``."""
+
+    if code == ErrorCode.EREPLACE:
+        logging.error("Processing failed: %s", message)
+        return
+    error = {
+        "event": "worksheet_parse_error",
+        "field": "worksheet",
+        "old": message,
+        "new": "",
+    }
+    logging.error(json.dumps(error))
+
+
+def _run_batch_command(
+    args: argparse.Namespace, template: Path, schema: dict[str, str] | None
+) -> None:
+    """Fill every worksheet of ``args.batch`` and report each result.
+
+    With ``--keep-going`` every worksheet is attempted and a summary is logged
+    at the end.
+
+    Raises:
+        FileNotFoundError: If the batch directory does not exist.
+        SystemExit: With the :class:`ErrorCode` of the first failed worksheet.
+    """
+
+    batch_dir = Path(args.batch)
+    if not batch_dir.is_dir():
+        raise FileNotFoundError(str(batch_dir))
+    with ExitStack() as stack:
+        archive = None
+        if args.archive:
+            # Outputs are staged on local disk and moved into the archive one
+            # at a time.
+            output_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+            archive = BatchArchive(
+                Path(args.archive).resolve(),
+                output_dir.resolve(),
+                index=args.results == "jsonl",
+            )
+            stack.callback(archive.close)
+        else:
+            output_dir = Path(args.output) if args.output else batch_dir
+            output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = (
+            BatchManifest(
+                output_dir / BatchManifest.filename(args.shard), template, schema
+            )
+            if args.incremental and not args.dry_run
+            else None
+        )
+        journal = (
+            BatchJournal(
+                output_dir / BatchJournal.filename(args.shard),
+                template,
+                schema,
+                args.resume,
+            )
+            if not (args.dry_run or archive)
+            else None
+        )
+        known_outputs: set[Path] = set()
+        for tracker in (manifest, journal):
+            if tracker:
+                known_outputs |= tracker.outputs()
+        stamp = f"{datetime.now():%Y%m%d_%H%M%S}"
+        worksheets = discover_worksheets(
+            batch_dir,
+            recursive=args.recursive,
+            exclude=output_dir,
+            shard=args.shard,
+            known_outputs=known_outputs,
+        )
+        tasks = [
+            BatchTask(
+                worksheet=worksheet,
+                output=(
+                    output_dir
+                    / worksheet.parent.relative_to(batch_dir)
+                    / f"{worksheet.stem}_{stamp}.docx"
+                ).resolve(),
+                dry_run=args.dry_run,
+            )
+            for worksheet in worksheets
+        ]
+        jobs = args.jobs if args.jobs is not None else os.cpu_count() or 1
+        results = stack.enter_context(
+            closing(
+                run_batch(
+                    template,
+                    tasks,
+                    schema,
+                    jobs,
+                    manifest,
+                    journal,
+                    max_memory=args.max_memory,
+                )
+            )
+        )
+        failures: list[BatchResult] = []
+        counts = {"ok": 0, "skipped": 0}
+        for result in results:
+            if archive:
+                archive.add(result)
+            if args.results == "jsonl":
+                print(
+                    json.dumps(result.to_record(), separators=(",", ":")),
+                    flush=True,
+                )
+            if not result.ok:
+                _log_failure(result.error_code, result.error)
+                if not args.keep_going:
+                    sys.exit(result.error_code)
+                failures.append(result)
+                continue
+            counts["skipped" if result.skipped else "ok"] += 1
+            if args.results == "jsonl":
+                continue
+            if args.dry_run:
+                print(json.dumps(result.diff, indent=2))
+            else:
+                print(str(result.output))
+
+    if args.keep_going:
+        summary = {
+            "event": "batch_summary",
+            "succeeded": counts["ok"],
+            "skipped": counts["skipped"],
+            "failed": len(failures),
+            "failures": [
+                {
+                    "worksheet": str(result.worksheet),
+                    "error_code": int(result.error_code),
+                    "error": result.error,
+                }
+                for result in failures
+            ],
+        }
+        logging.log(logging.ERROR if failures else logging.INFO, json.dumps(summary))
+        if failures:
+            sys.exit(failures[0].error_code)
+
+
+def _watch(args: argparse.Namespace) -> None:
+    """Run ``scdocbuilder watch`` until interrupted.
+
+    Raises:
+        SystemExit: With :class:`ErrorCode` if the watcher cannot start.
+    """
+
+    from .watch import FolderWatcher
+
+    _configure_logging(args.log_level)
+    schema = load_placeholder_schema(Path(args.schema)) if args.schema else None
+    try:
+        watcher = FolderWatcher(
+            Path(args.template),
+            Path(args.directory),
+            Path(args.output) if args.output else None,
+            schema,
+            settle=args.settle,
+        )
+    except FileNotFoundError as exc:
+        _log_failure(ErrorCode.ENOFILE, str(exc))
+        sys.exit(ErrorCode.ENOFILE)
+    except ValueError as exc:
+        _log_failure(ErrorCode.EVALID, str(exc))
+        sys.exit(ErrorCode.EVALID)
+
+    def report(result: BatchResult) -> None:
+        if result.ok:
+            print(str(result.output), flush=True)
+        else:
+            _log_failure(result.error_code, f"{result.worksheet}: {result.error}")
+
+    logging.info("Watching %s", args.directory)
+    try:
+        watcher.run(args.interval, report)
+    except KeyboardInterrupt:
+        logging.info("Stopped watching %s", args.directory)
+
+
 def main(argv: list[str] | None = None) -> None:
     """Run the placeholder replacer from the command line.
 
+    ``scdocbuilder watch DIR --template T`` instead keeps ``T`` loaded and
+    fills worksheets as they appear in ``DIR`` (see :func:`parse_watch_args`).
+
     Args:
         argv: Argument list or ``None`` to read from ``sys.argv``.
 
@@ -105,6 +472,12 @@ def main(argv: list[str] | None = None) -> None:
         SystemExit: With codes from :class:`ErrorCode` on failure.
     """
 
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["watch"]:
+        _watch(parse_watch_args(argv[1:]))
+        return
+
     args = parse_args(argv)
 
     if args.show_completion:
@@ -115,61 +488,31 @@ def main(argv: list[str] | None = None) -> None:
             sys.exit(ErrorCode.EVALID)
         return
 
-    handlers: list[logging.Handler] = [
-        logging.StreamHandler(),
-        RotatingFileHandler(
-            "scdocbuilder.log", maxBytes=5 * 1024 * 1024, backupCount=2
-        ),
-    ]
-    # Preserve any existing handlers (e.g. from tests) while configuring ours
-    existing = logging.getLogger().handlers
-    logging.basicConfig(
-        level=getattr(logging, args.log_level),
-        handlers=[*existing, *handlers],
-        force=True,
-    )
+    _configure_logging(args.log_level)
     template = Path(args.template)
     schema = load_placeholder_schema(Path(args.schema)) if args.schema else None
 
     try:
         if args.batch:
-            batch_dir = Path(args.batch)
-            if not batch_dir.is_dir():
-                raise FileNotFoundError(str(batch_dir))
-            output_dir = Path(args.output) if args.output else batch_dir
-            output_dir.mkdir(parents=True, exist_ok=True)
-            for worksheet in batch_dir.glob("*.docx"):
-                validate_input_files(template, worksheet)
-                template_doc = load_document(template)
-                worksheet_doc = load_document(worksheet)
-                validate_mandatory_fields(worksheet_doc)
-
-                values = processing.extract_fields(worksheet_doc, schema)
-                processing.replace_placeholders(template_doc, values)
-                processing.apply_conditionals(template_doc, values)
-
-                output = (
-                    output_dir / f"{worksheet.stem}_{datetime.now():%Y%m%d_%H%M%S}.docx"
-                ).resolve()
-
-                if args.dry_run:
-                    diff = {k: {"old": k, "new": v} for k, v in values.items()}
-                    print(json.dumps(diff, indent=2))
-                else:
-                    save_document(template_doc, output)
-                    print(str(output))
+            _run_batch_command(args, template, schema)
         else:
             worksheet = Path(args.worksheet)
 
             validate_input_files(template, worksheet)
 
-            template_doc = load_document(template)
-            worksheet_doc = load_document(worksheet)
-            validate_mandatory_fields(worksheet_doc)
+            worksheet_text = read_worksheet(worksheet)
+            validate_mandatory_fields(worksheet_text)
+            values = processing.extract_fields(worksheet_text, schema)
+
+            if args.dry_run:
+                # Only scan the template; nothing is filled or saved.
+                prepared = prepare_template(template, schema)
+                diff = processing.diff_compiled(prepared.compiled, values)
+                print(json.dumps(diff, indent=2))
+                return
 
-            values = processing.extract_fields(worksheet_doc, schema)
-            processing.replace_placeholders(template_doc, values)
-            processing.apply_conditionals(template_doc, values)
+            template_doc = load_document(template)
+            processing.fill_document(template_doc, values)
 
             output = (
                 Path(args.output).resolve()
@@ -179,34 +522,18 @@ def main(argv: list[str] | None = None) -> None:
                 ).resolve()
             )
 
-            if args.dry_run:
-                diff = {k: {"old": k, "new": v} for k, v in values.items()}
-                print(json.dumps(diff, indent=2))
-            else:
-                save_document(template_doc, output)
-                print(str(output))
-                if args.html_out:
-                    from .html_export import export_html
+            save_document(template_doc, output, only_modified=True)
+            print(str(output))
+            if args.html_out:
+                from .html_export import export_html
 
-                    html = export_html(template_doc)
-                    Path(args.html_out).write_text(html, encoding="utf-8")
+                html = export_html(template_doc)
+                Path(args.html_out).write_text(html, encoding="utf-8")
     except FileNotFoundError as exc:
-        error = {
-            "event": "worksheet_parse_error",
-            "field": "worksheet",
-            "old": str(exc),
-            "new": "",
-        }
-        logging.error(json.dumps(error))
+        _log_failure(ErrorCode.ENOFILE, str(exc))
         sys.exit(ErrorCode.ENOFILE)
     except ValueError as exc:
-        error = {
-            "event": "worksheet_parse_error",
-            "field": "worksheet",
-            "old": str(exc),
-            "new": "",
-        }
-        logging.error(json.dumps(error))
+        _log_failure(ErrorCode.EVALID, str(exc))
         sys.exit(ErrorCode.EVALID)
     except Exception as exc:
         logging.exception("Processing failed", exc_info=exc)
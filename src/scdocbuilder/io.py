@@ -2,14 +2,48 @@
 
 from __future__ import annotations
 
+import copy
+import posixpath
+import struct
+import zipfile
+from io import BytesIO
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterator, Union
+from weakref import WeakKeyDictionary
 
 from docx import Document
+from docx.opc.packuri import PackURI
+from docx.opc.part import XmlPart
+from docx.opc.pkgwriter import PackageWriter
+from docx.parts.document import DocumentPart
+from docx.parts.hdrftr import FooterPart, HeaderPart
+from lxml import etree
+
+from .processing import WorksheetText, modified_parts
 
 MAX_SIZE = 10 * 1024 * 1024  # 10 MB
 DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
+# A ``.docx`` given as a path, its bytes, or a readable binary file object.
+DocxSource = Union[Path, str, bytes, IO[bytes]]
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+# Original archive bytes of each loaded package, used to copy untouched parts
+# into saved documents without recompressing them.
+_SOURCES: WeakKeyDictionary[Any, bytes] = WeakKeyDictionary()
+
+# Text equivalents of run children, mirroring python-docx ``Run.text``.
+_RUN_TEXT = {
+    f"{_W}tab": "\t",
+    f"{_W}ptab": "\t",
+    f"{_W}cr": "\n",
+    f"{_W}noBreakHyphen": "-",
+}
+
 
 def validate_input_files(template: Path, worksheet: Path) -> None:
     """Validate that ``template`` and ``worksheet`` are DOCX files.
@@ -31,46 +65,390 @@ def validate_input_files(template: Path, worksheet: Path) -> None:
         if file.stat().st_size > MAX_SIZE:
             raise ValueError(f"{file} exceeds size limit")
         with file.open("rb") as fh:
-            head = fh.read(2048)
-            if head[:2] != b"PK":
-                raise ValueError(f"{file} is not a valid docx file")
-            try:
-                import magic
-
-                mime = magic.from_buffer(head, mime=True)
-            except (ImportError, AttributeError, OSError):
-                # Some environments provide the ``magic`` module but lack the
-                # underlying libmagic data files. Treat such errors as a missing
-                # dependency and proceed without MIME verification.
-                pass
-            else:
-                if mime != DOCX_MIME:
-                    raise ValueError(f"{file} has MIME {mime}")
+            _check_docx_head(fh.read(2048), str(file))
+
+
+def _check_docx_head(head: bytes, name: str) -> None:
+    """Raise ``ValueError`` unless ``head`` starts a DOCX archive."""
+
+    if head[:2] != b"PK":
+        raise ValueError(f"{name} is not a valid docx file")
+    try:
+        import magic
+
+        mime = magic.from_buffer(head, mime=True)
+    except (ImportError, AttributeError, OSError):
+        # Some environments provide the ``magic`` module but lack the
+        # underlying libmagic data files. Treat such errors as a missing
+        # dependency and proceed without MIME verification.
+        pass
+    else:
+        if mime != DOCX_MIME:
+            raise ValueError(f"{name} has MIME {mime}")
+
 
+def _read_docx_bytes(source: DocxSource) -> bytes:
+    """Return the bytes of ``source`` after validating it as a DOCX file.
 
-def load_document(path: Path) -> Any:
-    """Load a Word document from ``path``.
+    Paths get the checks of :func:`validate_input_files`. In-memory data is
+    held to the same size limit and header checks; file objects are read at
+    most one byte past :data:`MAX_SIZE`.
 
-    The file is first validated using :func:`validate_input_files` to ensure it
+    Args:
+        source: Path, bytes or readable binary file object.
+
+    Returns:
+        The document's bytes.
+
+    Raises:
+        FileNotFoundError: If a path does not exist.
+        ValueError: If ``source`` is not a valid ``.docx`` or is too large.
+    """
+
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        validate_input_files(path, path)
+        return path.read_bytes()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        data = source.read(MAX_SIZE + 1)
+    name = getattr(source, "name", None) or "document"
+    if len(data) > MAX_SIZE:
+        raise ValueError(f"{name} exceeds size limit")
+    _check_docx_head(data[:2048], str(name))
+    return data
+
+
+def load_document(source: DocxSource) -> Any:
+    """Load a Word document from a path, bytes or binary file object.
+
+    The data is first validated with :func:`_read_docx_bytes` to ensure it
     looks like a real DOCX archive. The returned object is the
-    :class:`python-docx` ``Document`` instance loaded from ``path``.
+    :class:`python-docx` ``Document`` instance loaded from ``source``.
+
+    Raises:
+        FileNotFoundError: If ``source`` is a missing path.
+        ValueError: If ``source`` is not a valid ``.docx`` file, including a
+            ZIP archive that is corrupt or lacks the package parts.
+    """
+
+    data = _read_docx_bytes(source)
+    try:
+        doc = Document(BytesIO(data))
+    except (zipfile.BadZipFile, KeyError) as exc:
+        raise ValueError(f"Not a valid DOCX file: {exc}") from exc
+    _SOURCES[doc.part.package] = data
+    return doc
+
+
+def _main_part_name(archive: zipfile.ZipFile) -> str:
+    """Return the ZIP member holding the main document part of ``archive``."""
+
+    try:
+        rels = etree.fromstring(
+            archive.read("_rels/.rels"),
+            etree.XMLParser(resolve_entities=False, no_network=True),
+        )
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels.iter(f"{_REL}Relationship"):
+        if rel.get("Type") == _OFFICE_DOCUMENT:
+            return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    return "word/document.xml"
+
+
+def _run_text(run: Any) -> str:
+    """Return the text of a ``w:r`` element like python-docx ``Run.text``."""
+
+    parts: list[str] = []
+    for child in run:
+        if child.tag == f"{_W}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{_W}br":
+            if child.get(f"{_W}type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            parts.append(_RUN_TEXT.get(child.tag, ""))
+    return "".join(parts)
+
+
+def _paragraph_text(p: Any) -> str:
+    """Return the text of a ``w:p`` element like python-docx ``Paragraph.text``."""
+
+    parts: list[str] = []
+    for child in p:
+        if child.tag == f"{_W}r":
+            parts.append(_run_text(child))
+        elif child.tag == f"{_W}hyperlink":
+            parts.extend(_run_text(r) for r in child.iterchildren(f"{_W}r"))
+    return "".join(parts)
+
+
+def _iter_table_rows(tbl: Any) -> Iterator[tuple[str, str]]:
+    """Yield the first two cell texts of each row in the ``w:tbl`` element.
+
+    Horizontal spans repeat a cell and vertically merged cells reuse the text
+    of the cell above, matching python-docx ``_Row.cells``.
+    """
+
+    above: dict[int, str] = {}
+    for tr in tbl.iterchildren(f"{_W}tr"):
+        before = tr.find(f"{_W}trPr/{_W}gridBefore")
+        offset = int(before.get(f"{_W}val", "0")) if before is not None else 0
+        cells: list[str] = []
+        current: dict[int, str] = {}
+        for tc in tr.iterchildren(f"{_W}tc"):
+            span_el = tc.find(f"{_W}tcPr/{_W}gridSpan")
+            span = int(span_el.get(f"{_W}val", "1")) if span_el is not None else 1
+            merge = tc.find(f"{_W}tcPr/{_W}vMerge")
+            if merge is not None and merge.get(f"{_W}val", "continue") == "continue":
+                text = above.get(offset, "")
+            else:
+                text = "\n".join(_paragraph_text(p) for p in tc.iterchildren(f"{_W}p"))
+            current[offset] = text
+            cells.extend([text] * span)
+            offset += span
+        above = current
+        if len(cells) >= 2:
+            yield cells[0], cells[1]
+
+
+def read_worksheet(source: DocxSource) -> WorksheetText:
+    """Stream the paragraph and table text of the worksheet ``source``.
+
+    The main document part is read straight from the ZIP archive with
+    :func:`lxml.etree.iterparse`; each top-level paragraph and table is
+    discarded once its text is collected. No python-docx object model is
+    built, so the result suits :func:`~scdocbuilder.processing.extract_fields`
+    and :func:`~scdocbuilder.validation.validate_mandatory_fields` on large
+    worksheets.
+
+    Args:
+        source: Worksheet ``.docx`` path, bytes or binary file object.
+
+    Returns:
+        Body paragraph texts and two-column table rows of the worksheet.
+
+    Raises:
+        FileNotFoundError: If ``source`` is a missing path.
+        ValueError: If ``source`` is not a valid ``.docx`` file.
+    """
+
+    if isinstance(source, (str, Path)):
+        # Paths are read lazily by ``zipfile`` rather than loaded whole.
+        archive_source: Any = Path(source)
+        validate_input_files(archive_source, archive_source)
+    else:
+        archive_source = BytesIO(_read_docx_bytes(source))
+    try:
+        return _read_worksheet_archive(archive_source)
+    except (zipfile.BadZipFile, KeyError) as exc:
+        raise ValueError(f"Not a valid DOCX file: {exc}") from exc
+
+
+def _read_worksheet_archive(archive_source: Any) -> WorksheetText:
+    """Collect the worksheet text of the ZIP archive ``archive_source``."""
+
+    paragraphs: list[str] = []
+    rows: list[tuple[str, str]] = []
+    body = f"{_W}body"
+    with zipfile.ZipFile(archive_source) as archive:
+        with archive.open(_main_part_name(archive)) as fh:
+            for _, element in etree.iterparse(
+                fh,
+                events=("end",),
+                tag=(f"{_W}p", f"{_W}tbl"),
+                resolve_entities=False,
+                no_network=True,
+            ):
+                parent = element.getparent()
+                if parent is None or parent.tag != body:
+                    # Nested paragraphs and tables are handled with their
+                    # top-level container.
+                    continue
+                if element.tag == f"{_W}p":
+                    paragraphs.append(_paragraph_text(element))
+                else:
+                    rows.extend(_iter_table_rows(element))
+                element.clear()
+                parent.remove(element)
+    return WorksheetText(paragraphs=paragraphs, rows=rows)
+
+
+def clone_document(doc: Any) -> Any:
+    """Return an independent in-memory copy of ``doc`` for one fill.
+
+    Only the main document, header and footer parts are deep-copied since they
+    are the parts placeholder processing edits. Other XML parts such as styles
+    and all binary parts are shared with ``doc`` and must be treated as
+    read-only by callers of either copy.
+
+    Args:
+        doc: Document returned by :func:`load_document`.
+
+    Returns:
+        New ``Document`` whose body, headers and footers can be modified
+        without affecting ``doc``.
+    """
+
+    memo: dict[int, Any] = {}
+    for part in doc.part.package.iter_parts():
+        if not isinstance(part, XmlPart):
+            continue
+        element = part._element
+        if isinstance(part, (DocumentPart, HeaderPart, FooterPart)):
+            memo[id(element)] = copy.deepcopy(element)
+        else:
+            memo[id(element)] = element
+    clone = copy.deepcopy(doc, memo)
+    # ``Document`` caches a ``_Body`` proxy once ``paragraphs`` or ``tables``
+    # is read. Its ``w:body`` is not a part root, so the deep copy above gave
+    # the clone a detached copy; drop it so the proxy is rebuilt over the
+    # clone's own body.
+    clone._Document__body = None
+    source = _SOURCES.get(doc.part.package)
+    if source is not None:
+        _SOURCES[clone.part.package] = source
+    return clone
+
+
+# Fixed part of a ZIP local file header (APPNOTE.TXT section 4.3.7): the
+# file name and extra field lengths are its last two 2-byte fields.
+_LOCAL_HEADER_SIZE = 30
+
+
+def _append_raw_member(
+    target: zipfile.ZipFile, info: zipfile.ZipInfo, raw: bytes
+) -> None:
+    """Append already-compressed ``raw`` bytes to ``target`` as ``info``.
+
+    ``zipfile`` has no public API for this, so this is the one place that
+    relies on its internals: the entry is written at the end of the archive
+    and registered in ``filelist``/``NameToInfo`` so the central directory
+    written on close includes it, ``start_dir`` is moved past it and
+    ``_didModify`` marks the archive as changed.
+    """
+
+    fp = target.fp
+    assert fp is not None
+    out = copy.copy(info)
+    out.flag_bits &= ~0x08  # sizes and CRC are known up front
+    out.header_offset = fp.tell()
+    fp.write(out.FileHeader())
+    fp.write(raw)
+    target.filelist.append(out)
+    target.NameToInfo[out.filename] = out
+    target.start_dir = fp.tell()
+    target._didModify = True  # type: ignore[attr-defined]
+
+
+class _ZipPartWriter:
+    """Write package items, copying unchanged members raw from a source ZIP.
+
+    Provides the ``write(pack_uri, blob)`` interface python-docx's
+    :class:`~docx.opc.pkgwriter.PackageWriter` helpers expect.
+    """
+
+    def __init__(self, source: zipfile.ZipFile, target: zipfile.ZipFile) -> None:
+        self._source = source
+        self._target = target
+
+    def write(self, pack_uri: PackURI, blob: bytes) -> None:
+        self._target.writestr(pack_uri.membername, blob)
+
+    def copy_raw(self, name: str) -> bool:
+        """Copy member ``name`` from the source without recompressing it.
+
+        Returns:
+            ``False`` if the source has no such member.
+        """
+
+        try:
+            info = self._source.getinfo(name)
+        except KeyError:
+            return False
+        src = self._source.fp
+        if src is None or self._target.fp is None:
+            return False
+        src.seek(info.header_offset)
+        header = src.read(_LOCAL_HEADER_SIZE)
+        name_len, extra_len = struct.unpack("<HH", header[26:_LOCAL_HEADER_SIZE])
+        src.seek(name_len + extra_len, 1)
+        _append_raw_member(self._target, info, src.read(info.compress_size))
+        return True
+
+
+def _save_incremental(
+    doc: Any, target: Path | IO[bytes], source: bytes, keep: frozenset[str] | None
+) -> None:
+    """Write ``doc`` to ``target`` reusing unchanged members of ``source``.
+
+    Binary parts are always copied raw since python-docx never edits them. XML
+    parts are re-serialized unless ``keep`` is given and omits their name.
     """
 
-    validate_input_files(path, path)
-    return Document(str(path))
+    package = doc.part.package
+    parts = package.parts
+    for part in parts:
+        part.before_marshal()
+    with zipfile.ZipFile(BytesIO(source)) as src, zipfile.ZipFile(
+        target, "w", compression=zipfile.ZIP_DEFLATED
+    ) as dst:
+        writer = _ZipPartWriter(src, dst)
+        PackageWriter._write_content_types_stream(writer, parts)
+        PackageWriter._write_pkg_rels(writer, package.rels)
+        for part in parts:
+            changed = isinstance(part, XmlPart) and (
+                keep is None or str(part.partname) in keep
+            )
+            if changed or not writer.copy_raw(part.partname.membername):
+                writer.write(part.partname, part.blob)
+            if len(part.rels):
+                writer.write(part.partname.rels_uri, part.rels.xml)
 
 
-def save_document(doc: Any, path: Path) -> None:
-    """Persist ``doc`` to ``path``.
+def save_document(
+    doc: Any,
+    path: Path | str | IO[bytes] | None = None,
+    only_modified: bool = False,
+) -> bytes | None:
+    """Persist ``doc`` to ``path``, a binary file object, or bytes.
+
+    Documents from :func:`load_document` or :func:`clone_document` are written
+    by streaming their original archive: images, fonts and other binary parts
+    are copied without recompressing them.
 
     Args:
         doc: Document to write.
-        path: Destination filename ending with ``.docx``.
+        path: Destination filename ending with ``.docx``, a writable binary
+            file object, or ``None`` to return the document as bytes.
+        only_modified: Also copy XML parts unchanged unless the processing
+            functions edited them (see
+            :func:`~scdocbuilder.processing.modified_parts`). Only set this
+            when nothing else has modified ``doc``.
+
+    Returns:
+        The document's bytes when ``path`` is ``None``, otherwise ``None``.
 
     Raises:
-        ValueError: If ``path`` does not end with ``.docx``.
+        ValueError: If ``path`` is a filename not ending with ``.docx``.
     """
 
-    if path.suffix.lower() != ".docx":
-        raise ValueError("Output path must be .docx")
-    doc.save(str(path))
+    buffer = None
+    target: Path | IO[bytes]
+    if path is None:
+        target = buffer = BytesIO()
+    elif isinstance(path, (str, Path)):
+        target = Path(path)
+        if target.suffix.lower() != ".docx":
+            raise ValueError("Output path must be .docx")
+    else:
+        target = path
+    source = _SOURCES.get(doc.part.package)
+    if source is None:
+        doc.save(str(target) if isinstance(target, Path) else target)
+    else:
+        keep = modified_parts(doc) if only_modified else None
+        _save_incremental(doc, target, source, keep)
+    return buffer.getvalue() if buffer is not None else None
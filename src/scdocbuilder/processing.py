@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from weakref import WeakKeyDictionary
 from docx.document import Document
+from docx.oxml.ns import nsmap, qn
 from docx.text.paragraph import Paragraph
 
-from typing import Any, Dict
+from lxml import etree
+from typing import Any, Callable, Dict, Iterable, Iterator, Sequence
 
 DEFAULT_FIELD_MAPPINGS: Dict[str, str] = {
     "Applicant name:": "{Applicant name}",
@@ -22,21 +28,120 @@ DEFAULT_FIELD_MAPPINGS: Dict[str, str] = {
 # Precompile regex used for conditional blocks once at module import
 OPTION_PATTERN = re.compile(r"\[\[OPTION_(\d+)\]\](.*?)\[\[/OPTION_\1\]\]", re.DOTALL)
 
+# Compiled once at import; every text box paragraph below a part's root.
+_TEXTBOX_PARAGRAPHS = etree.XPath(".//w:txbxContent//w:p", namespaces={"w": nsmap["w"]})
 
-def _iter_textbox_paragraphs(part: Any) -> list[Paragraph]:
-    """Return paragraphs contained in text boxes of ``part``.
+# A stage edits one paragraph in place during the shared document walk.
+ParagraphStage = Callable[[Paragraph], None]
+
+# Names of the parts each package has had paragraphs edited in, so saving can
+# leave every other part untouched.
+_MODIFIED_PARTS: WeakKeyDictionary[Any, set[str]] = WeakKeyDictionary()
+
+
+@dataclass(frozen=True)
+class WorksheetText:
+    """Plain text of a worksheet, as read by :func:`scdocbuilder.io.read_worksheet`.
+
+    Attributes:
+        paragraphs: Text of each body paragraph, in document order.
+        rows: First two cell texts of each top-level table row with at least
+            two cells.
+    """
+
+    paragraphs: list[str]
+    rows: list[tuple[str, str]]
+
+
+def _iter_textbox_paragraphs(part: Any) -> Iterator[Paragraph]:
+    """Yield paragraphs contained in text boxes of ``part``.
 
     Args:
         part: Document part whose text boxes are searched.
 
+    Yields:
+        Each paragraph inside any text box, in document order.
+    """
+
+    for p in _TEXTBOX_PARAGRAPHS(part.element):
+        yield Paragraph(p, part)
+
+
+def _iter_document_paragraphs(doc: Document) -> Iterator[Paragraph]:
+    """Yield every paragraph of ``doc`` that processing visits, once each.
+
+    Body paragraphs, text boxes, table cells and each section's header and
+    footer are walked in that order. Every header and footer part is walked
+    once however many sections show it, and paragraphs reachable more than
+    once, such as those in merged table cells, are only yielded the first time.
+    """
+
+    # Hold the elements themselves rather than their ids: lxml may free an
+    # element proxy once nothing references it and reuse its id for another.
+    seen: set[Any] = set()
+
+    def fresh(paragraphs: Iterable[Paragraph]) -> Iterator[Paragraph]:
+        for paragraph in paragraphs:
+            if paragraph._p not in seen:
+                seen.add(paragraph._p)
+                yield paragraph
+
+    def table_paragraphs(tables: Iterable[Any]) -> Iterator[Paragraph]:
+        for table in tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    yield from cell.paragraphs
+
+    yield from fresh(doc.paragraphs)
+    yield from fresh(_iter_textbox_paragraphs(doc.part))
+    yield from fresh(table_paragraphs(doc.tables))
+    visited_parts: set[Any] = set()
+    for section in doc.sections:
+        for hdr in (section.header, section.footer):
+            # A linked header has no part of its own: it shows an earlier
+            # section's part, and touching it on the first section would add an
+            # empty definition. Sections may also share a part explicitly.
+            if hdr.is_linked_to_previous or hdr.part in visited_parts:
+                continue
+            visited_parts.add(hdr.part)
+            yield from fresh(hdr.paragraphs)
+            yield from fresh(table_paragraphs(hdr.tables))
+            yield from fresh(_iter_textbox_paragraphs(hdr.part))
+
+
+def _process_paragraphs(doc: Document, stages: Sequence[ParagraphStage]) -> None:
+    """Walk ``doc`` once, running every stage on each paragraph in turn.
+
+    Args:
+        doc: Document to modify in place.
+        stages: Callables applied in order to each visited paragraph.
+    """
+
+    if not stages:
+        return
+    for paragraph in _iter_document_paragraphs(doc):
+        for stage in stages:
+            stage(paragraph)
+
+
+def _mark_modified(paragraph: Paragraph) -> None:
+    """Record that the part holding ``paragraph`` has been edited."""
+
+    part = paragraph.part
+    _MODIFIED_PARTS.setdefault(part.package, set()).add(str(part.partname))
+
+
+def modified_parts(doc: Document) -> frozenset[str]:
+    """Return the names of parts whose paragraphs processing has edited.
+
+    Args:
+        doc: Document previously passed to the processing functions.
+
     Returns:
-        List of paragraphs inside any text boxes.
+        Part names such as ``/word/document.xml``; empty if nothing changed.
     """
-    paragraphs: list[Paragraph] = []
-    for txbx in part.element.xpath(".//w:txbxContent"):
-        for p in txbx.xpath(".//w:p"):
-            paragraphs.append(Paragraph(p, part))
-    return paragraphs
+
+    return frozenset(_MODIFIED_PARTS.get(doc.part.package, ()))
 
 
 def _set_paragraph_text(paragraph: Paragraph, text: str) -> None:
@@ -47,19 +152,66 @@ def _set_paragraph_text(paragraph: Paragraph, text: str) -> None:
         text: New content for the paragraph.
     """
 
+    _mark_modified(paragraph)
     for run in list(paragraph.runs):
         paragraph._p.remove(run._r)
     if text:
         paragraph.add_run(text)
 
 
+@lru_cache(maxsize=32)
+def _field_trie(items: tuple[tuple[str, str], ...]) -> dict[str | None, Any]:
+    """Build a character trie of worksheet fields.
+
+    Each node maps the next character to a child node; the ``None`` key holds
+    the ``(field, placeholder)`` pair of a field ending at that node.
+    """
+
+    root: dict[str | None, Any] = {}
+    for field, placeholder in items:
+        node = root
+        for char in field:
+            node = node.setdefault(char, {})
+        node[None] = (field, placeholder)
+    return root
+
+
+def _match_field(trie: dict[str | None, Any], text: str) -> tuple[str, str] | None:
+    """Return the longest field in ``trie`` that ``text`` starts with.
+
+    Preferring the longest field avoids partial matches when one field name is
+    a prefix of another ("A" vs. "A detail").
+    """
+
+    node = trie
+    found = node.get(None)
+    for char in text:
+        child: dict[str | None, Any] | None = node.get(char)
+        if child is None:
+            break
+        node = child
+        found = node.get(None, found)
+    return found
+
+
+def _iter_table_rows(doc: Document) -> Iterator[tuple[str, str]]:
+    """Yield the first two cell texts of each top-level table row in ``doc``."""
+
+    for table in doc.tables:
+        for row in table.rows:
+            cells = row.cells
+            if len(cells) >= 2:
+                yield cells[0].text, cells[1].text
+
+
 def extract_fields(
-    doc: Document, field_mappings: Dict[str, str] | None = None
+    doc: Document | WorksheetText, field_mappings: Dict[str, str] | None = None
 ) -> Dict[str, str]:
     """Extract placeholder values from a worksheet document.
 
     Args:
-        doc: Worksheet document to parse.
+        doc: Worksheet document to parse, or its text from
+            :func:`scdocbuilder.io.read_worksheet`.
         field_mappings: Optional mapping of question text to placeholders.
 
     Returns:
@@ -73,52 +225,164 @@ def extract_fields(
     if field_mappings is None:
         field_mappings = DEFAULT_FIELD_MAPPINGS
 
-    # Prefer longer keys first to avoid partial matches when one field name is a
-    # prefix of another ("A" vs. "A detail").  Iterate over the sorted mapping
-    # once so both paragraph scanning and multi-line termination checks use the
-    # same ordering.
-    items = sorted(field_mappings.items(), key=lambda kv: len(kv[0]), reverse=True)
-    fields = [field for field, _ in items]
-
+    trie = _field_trie(tuple(field_mappings.items()))
     results: Dict[str, str] = {}
 
-    def clean(text: str) -> str:
-        return text.strip()
-
-    paragraphs = list(doc.paragraphs)
-    for i, paragraph in enumerate(paragraphs):
-        text = paragraph.text.strip()
-        for field, placeholder in items:
-            if text.startswith(field):
-                value = text[len(field) :].strip()
-                if not value:
-                    lines = []
-                    j = i + 1
-                    while j < len(paragraphs):
-                        next_text = paragraphs[j].text.strip()
-                        if not next_text or any(
-                            next_text.startswith(f) for f in fields
-                        ):
-                            break
-                        lines.append(next_text)
-                        j += 1
-                    value = "\n".join(lines)
-                results[placeholder] = clean(value)
-                break
-
-    for table in doc.tables:
-        for row in table.rows:
-            if len(row.cells) >= 2:
-                key = clean(row.cells[0].text)
-                for field, placeholder in items:
-                    if key.startswith(field):
-                        value = clean(row.cells[1].text)
-                        results[placeholder] = value
-                        break
+    # Single forward pass: an empty answer opens a multi-line capture that
+    # collects following paragraphs until a blank line or the next field.
+    if isinstance(doc, WorksheetText):
+        paragraphs: Iterable[str] = doc.paragraphs
+        rows: Iterable[tuple[str, str]] = doc.rows
+    else:
+        paragraphs = (paragraph.text for paragraph in doc.paragraphs)
+        rows = _iter_table_rows(doc)
+
+    pending: str | None = None
+    lines: list[str] = []
+    for raw in paragraphs:
+        text = raw.strip()
+        match = _match_field(trie, text)
+        if pending is not None:
+            if text and match is None:
+                lines.append(text)
+                continue
+            results[pending] = "\n".join(lines)
+            pending = None
+        if match is None:
+            continue
+        field, placeholder = match
+        value = text[len(field) :].strip()
+        if value:
+            results[placeholder] = value
+        else:
+            pending, lines = placeholder, []
+    if pending is not None:
+        results[pending] = "\n".join(lines)
+
+    for key, value in rows:
+        match = _match_field(trie, key.strip())
+        if match is not None:
+            results[match[1]] = value.strip()
 
     return results
 
 
+@lru_cache(maxsize=32)
+def _placeholder_pattern(placeholders: frozenset[str]) -> re.Pattern[str] | None:
+    """Return one regex matching any of ``placeholders`` in a single scan.
+
+    Longer placeholders come first in the alternation so ``{A1}`` wins over
+    ``{A}``. Empty placeholders are ignored; ``None`` means nothing to match.
+    """
+
+    ordered = sorted((p for p in placeholders if p), key=lambda p: (-len(p), p))
+    if not ordered:
+        return None
+    return re.compile("|".join(re.escape(p) for p in ordered))
+
+
+def _run_offsets(texts: list[str]) -> list[int]:
+    """Return the start offset of each run text within the joined text."""
+
+    starts: list[int] = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+    return starts
+
+
+def _substitute(
+    text: str,
+    matches: list[re.Match[str]],
+    values: Dict[str, str],
+    offset: int = 0,
+) -> str:
+    """Build ``text`` with each match swapped for its value in one pass.
+
+    ``offset`` is the position of ``text`` inside the string the matches were
+    found in.
+    """
+
+    parts: list[str] = []
+    pos = 0
+    for match in matches:
+        parts.append(text[pos : match.start() - offset])
+        parts.append(values[match.group(0)])
+        pos = match.end() - offset
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _replace_in_paragraph(
+    paragraph: Any, values: Dict[str, str], pattern: re.Pattern[str] | None
+) -> None:
+    """Replace placeholders from ``values`` inside a single paragraph.
+
+    ``pattern`` is the :func:`_placeholder_pattern` for ``values``; callers
+    build it once per fill rather than once per paragraph.
+    """
+
+    if pattern is None:
+        return
+    runs = paragraph.runs
+    texts = [run.text for run in runs]
+    full_text = "".join(texts)
+    matches = list(pattern.finditer(full_text))
+    if not matches:
+        return
+
+    starts = _run_offsets(texts)
+    by_run: dict[int, list[re.Match[str]]] = {}
+    for match in matches:
+        first = bisect_right(starts, match.start()) - 1
+        last = bisect_right(starts, match.end() - 1) - 1
+        if first != last:
+            # A placeholder spans several runs; rewrite the paragraph as one
+            # run holding the fully substituted text.
+            _set_paragraph_text(paragraph, _substitute(full_text, matches, values))
+            return
+        by_run.setdefault(first, []).append(match)
+
+    # Every placeholder lives inside a single run, so edit only those runs and
+    # keep their formatting.
+    _mark_modified(paragraph)
+    for index, run_matches in by_run.items():
+        runs[index].text = _substitute(texts[index], run_matches, values, starts[index])
+
+
+def _resolve_options(paragraph: Paragraph, active: str) -> None:
+    """Keep only the ``active`` OPTION block inside ``paragraph``."""
+
+    full_text = "".join(run.text for run in paragraph.runs)
+    if "[[OPTION_" not in full_text:
+        return
+
+    def repl(match: re.Match[str]) -> str:
+        option, content = match.group(1), match.group(2)
+        return content if option == active else ""
+
+    new_text = re.sub(OPTION_PATTERN, repl, full_text)
+    if new_text != full_text:
+        cleaned = "\n".join(
+            line.strip() for line in new_text.splitlines() if line.strip()
+        )
+        _set_paragraph_text(paragraph, cleaned)
+
+
+def _fill_stages(values: Dict[str, str]) -> list[ParagraphStage]:
+    """Return the replacement and conditional stages for ``values``."""
+
+    pattern = _placeholder_pattern(frozenset(values))
+    stages: list[ParagraphStage] = [
+        lambda paragraph: _replace_in_paragraph(paragraph, values, pattern)
+    ]
+    active = values.get("{Action option}")
+    if active:
+        stages.append(lambda paragraph: _resolve_options(paragraph, active))
+    return stages
+
+
 def replace_placeholders(doc: Document, values: Dict[str, str]) -> None:
     """Replace all placeholders in ``doc`` with ``values``.
 
@@ -127,47 +391,10 @@ def replace_placeholders(doc: Document, values: Dict[str, str]) -> None:
         values: Mapping of placeholders to replacement text.
     """
 
-    def process_paragraph(paragraph: Any) -> None:
-        # First replace placeholders that live entirely within individual runs so
-        # that we preserve existing formatting for those segments.
-        for run in paragraph.runs:
-            for placeholder, val in values.items():
-                if placeholder in run.text:
-                    run.text = run.text.replace(placeholder, val)
-
-        # After the per-run replacements we may still have placeholders that span
-        # multiple runs. Join the paragraph text and perform a final replacement
-        # pass; if the combined text changes we rewrite the paragraph using the
-        # helper that removes all runs.
-        full_text = "".join(run.text for run in paragraph.runs)
-        replaced = full_text
-        for placeholder, val in values.items():
-            replaced = replaced.replace(placeholder, val)
-        if replaced != full_text:
-            _set_paragraph_text(paragraph, replaced)
-
-    for paragraph in doc.paragraphs:
-        process_paragraph(paragraph)
-    for paragraph in _iter_textbox_paragraphs(doc.part):
-        process_paragraph(paragraph)
-
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    process_paragraph(paragraph)
-
-    for section in doc.sections:
-        for hdr in (section.header, section.footer):
-            for paragraph in hdr.paragraphs:
-                process_paragraph(paragraph)
-            for table in hdr.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            process_paragraph(paragraph)
-            for paragraph in _iter_textbox_paragraphs(hdr.part):
-                process_paragraph(paragraph)
+    pattern = _placeholder_pattern(frozenset(values))
+    _process_paragraphs(
+        doc, [lambda paragraph: _replace_in_paragraph(paragraph, values, pattern)]
+    )
 
 
 def apply_conditionals(doc: Document, answers: Dict[str, str]) -> None:
@@ -181,42 +408,246 @@ def apply_conditionals(doc: Document, answers: Dict[str, str]) -> None:
     active = answers.get("{Action option}")
     if not active:
         return
+    _process_paragraphs(doc, [lambda paragraph: _resolve_options(paragraph, active)])
 
-    def process_paragraph(paragraph: Paragraph) -> None:
-        full_text = "".join(run.text for run in paragraph.runs)
-        if "[[OPTION_" not in full_text:
-            return
 
-        def repl(match: re.Match[str]) -> str:
-            option, content = match.group(1), match.group(2)
-            return content if option == active else ""
+def fill_document(doc: Document, values: Dict[str, str]) -> None:
+    """Replace placeholders and resolve OPTION blocks in a single walk.
+
+    Equivalent to :func:`replace_placeholders` followed by
+    :func:`apply_conditionals` but visits every paragraph only once.
+
+    Args:
+        doc: Template document to modify.
+        values: Mapping of placeholders to replacement text, including
+            ``{Action option}`` when conditional blocks should be resolved.
+    """
+
+    _process_paragraphs(doc, _fill_stages(values))
+
+
+@dataclass(frozen=True)
+class PlaceholderSite:
+    """Location of a template paragraph with placeholders or OPTION blocks.
+
+    Attributes:
+        part: Package part name holding the paragraph, e.g. ``/word/header1.xml``.
+        path: Child indices leading from the part's root element to the ``w:p``.
+        spans: ``(placeholder, first_run, last_run)`` for each occurrence.
+        options: Whether the paragraph holds ``[[OPTION_n]]`` blocks.
+    """
+
+    part: str
+    path: tuple[int, ...]
+    spans: tuple[tuple[str, int, int], ...]
+    options: bool = False
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Index of every placeholder occurrence in a template document.
+
+    Attributes:
+        placeholders: Placeholders the template was compiled for.
+        sites: Paragraph locations in document order.
+    """
+
+    placeholders: frozenset[str]
+    sites: tuple[PlaceholderSite, ...]
+
+
+def _element_path(element: Any) -> tuple[int, ...]:
+    """Return child indices leading from the root of ``element``'s tree."""
+
+    path: list[int] = []
+    parent = element.getparent()
+    while parent is not None:
+        path.append(parent.index(element))
+        element, parent = parent, parent.getparent()
+    return tuple(reversed(path))
+
+
+def _resolve_path(root: Any, path: tuple[int, ...]) -> Any:
+    """Return the element at ``path`` below ``root`` or ``None`` if missing."""
+
+    element = root
+    for index in path:
+        if index >= len(element):
+            return None
+        element = element[index]
+    return element
+
 
-        new_text = re.sub(OPTION_PATTERN, repl, full_text)
-        if new_text != full_text:
-            cleaned = "\n".join(
-                line.strip() for line in new_text.splitlines() if line.strip()
+def _find_spans(
+    texts: list[str], pattern: re.Pattern[str]
+) -> list[tuple[str, int, int]]:
+    """Locate matches of ``pattern`` in the joined run ``texts``.
+
+    Returns:
+        ``(placeholder, first_run, last_run)`` for each occurrence.
+    """
+
+    starts = _run_offsets(texts)
+    return [
+        (
+            match.group(0),
+            bisect_right(starts, match.start()) - 1,
+            bisect_right(starts, match.end() - 1) - 1,
+        )
+        for match in pattern.finditer("".join(texts))
+    ]
+
+
+def compile_template(
+    doc: Document, placeholders: Iterable[str] | None = None
+) -> CompiledTemplate:
+    """Record where each placeholder sits in the template ``doc``.
+
+    Paragraphs holding OPTION blocks are recorded as well. The returned index
+    can fill any document loaded from the same template via
+    :func:`fill_compiled` without rescanning paragraphs that hold neither.
+
+    Args:
+        doc: Template document to index. It is not modified.
+        placeholders: Placeholders to look for. Defaults to the values of
+            :data:`DEFAULT_FIELD_MAPPINGS`.
+
+    Returns:
+        Compiled placeholder index for ``doc``.
+    """
+
+    if placeholders is None:
+        placeholders = DEFAULT_FIELD_MAPPINGS.values()
+    wanted = frozenset(p for p in placeholders if p)
+
+    pattern = _placeholder_pattern(wanted)
+    sites: list[PlaceholderSite] = []
+    for paragraph in _iter_document_paragraphs(doc):
+        texts = [run.text for run in paragraph.runs]
+        spans = _find_spans(texts, pattern) if pattern is not None else []
+        options = "[[OPTION_" in "".join(texts)
+        if not (spans or options):
+            continue
+        sites.append(
+            PlaceholderSite(
+                part=str(paragraph.part.partname),
+                path=_element_path(paragraph._p),
+                spans=tuple(spans),
+                options=options,
             )
-            _set_paragraph_text(paragraph, cleaned)
+        )
+    return CompiledTemplate(placeholders=wanted, sites=tuple(sites))
 
-    for paragraph in doc.paragraphs:
-        process_paragraph(paragraph)
-    for paragraph in _iter_textbox_paragraphs(doc.part):
-        process_paragraph(paragraph)
 
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    process_paragraph(paragraph)
+def fill_compiled(
+    doc: Document, compiled: CompiledTemplate, values: Dict[str, str]
+) -> None:
+    """Fill ``doc`` using only the locations recorded in ``compiled``.
 
-    for section in doc.sections:
-        for hdr in (section.header, section.footer):
-            for paragraph in hdr.paragraphs:
-                process_paragraph(paragraph)
-            for table in hdr.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            process_paragraph(paragraph)
-            for paragraph in _iter_textbox_paragraphs(hdr.part):
-                process_paragraph(paragraph)
+    Placeholders are replaced and, when ``{Action option}`` is set, OPTION
+    blocks are resolved in the same visit of each recorded paragraph.
+
+    Args:
+        doc: Document loaded from the template that ``compiled`` indexes.
+        compiled: Index returned by :func:`compile_template`.
+        values: Mapping of placeholders to replacement text.
+    """
+
+    parts = {str(part.partname): part for part in doc.part.package.iter_parts()}
+
+    # Resolve every site before editing so rewriting one paragraph cannot
+    # shift the paths of those that follow.
+    targets: list[tuple[PlaceholderSite, Paragraph]] = []
+    for site in compiled.sites:
+        part = parts.get(site.part)
+        if part is None:
+            continue
+        element = _resolve_path(part.element, site.path)
+        if element is None or element.tag != qn("w:p"):
+            continue
+        targets.append((site, Paragraph(element, part)))
+
+    active = values.get("{Action option}")
+    for site, paragraph in targets:
+        _fill_site(site, paragraph, values)
+        if site.options and active:
+            _resolve_options(paragraph, active)
+
+
+def diff_compiled(
+    compiled: CompiledTemplate, values: Dict[str, str]
+) -> Dict[str, Dict[str, Any]]:
+    """Describe what :func:`fill_compiled` would change, without editing.
+
+    Each placeholder that has a value or occurs in the template maps to:
+
+    * ``old``: the placeholder text.
+    * ``new``: its value, or ``None`` when the worksheet gave none.
+    * ``status``: ``"replace"`` if it occurs and has a value, ``"missing"`` if
+      it occurs without a value, or ``"unused"`` if it has a value but does
+      not occur.
+    * ``locations``: one ``{"part", "path"}`` entry per occurrence, with
+      ``path`` as in :class:`PlaceholderSite`.
+
+    Paragraphs with OPTION blocks are listed under ``{Action option}``.
+
+    Args:
+        compiled: Index returned by :func:`compile_template`.
+        values: Mapping of placeholders to replacement text.
+
+    Returns:
+        Mapping of placeholders to their change description.
+    """
+
+    locations: Dict[str, list[Dict[str, Any]]] = {key: [] for key in values}
+    for site in compiled.sites:
+        where = {"part": site.part, "path": list(site.path)}
+        names = [span[0] for span in site.spans]
+        if site.options:
+            names.append("{Action option}")
+        for name in names:
+            locations.setdefault(name, []).append(where)
+
+    diff: Dict[str, Dict[str, Any]] = {}
+    for placeholder, found in locations.items():
+        new = values.get(placeholder)
+        if new is None:
+            status = "missing"
+        else:
+            status = "replace" if found else "unused"
+        diff[placeholder] = {
+            "old": placeholder,
+            "new": new,
+            "status": status,
+            "locations": found,
+        }
+    return diff
+
+
+def _fill_site(
+    site: PlaceholderSite, paragraph: Paragraph, values: Dict[str, str]
+) -> None:
+    """Replace the placeholders recorded for ``site`` in ``paragraph``."""
+
+    subset = {
+        placeholder: values[placeholder]
+        for placeholder in dict.fromkeys(span[0] for span in site.spans)
+        if placeholder in values
+    }
+    if not subset:
+        return
+    runs = paragraph.runs
+    pattern = _placeholder_pattern(frozenset(subset))
+    if pattern is not None and all(
+        first == last < len(runs) for _, first, last in site.spans
+    ):
+        # Every occurrence sits inside one run; edit just those runs.
+        for index in sorted({first for _, first, _ in site.spans}):
+            run = runs[index]
+            text = run.text
+            replaced = pattern.sub(lambda m: subset[m.group(0)], text)
+            if replaced != text:
+                _mark_modified(paragraph)
+                run.text = replaced
+    else:
+        _replace_in_paragraph(paragraph, subset, pattern)
@@ -2,35 +2,54 @@
 
 from __future__ import annotations
 
+from io import BytesIO
 from pathlib import Path
+from typing import IO
 
 MACRO_PATTERNS = [b"vbaproject", b"macros"]
 
 
-def reject_macros(path: Path) -> None:
-    """Raise ``ValueError`` if ``path`` contains macros.
+def reject_macros(source: Path | str | bytes | IO[bytes]) -> None:
+    """Raise ``ValueError`` if ``source`` contains macros.
 
     Args:
-        path: Uploaded document to inspect.
+        source: Uploaded document to inspect, as a path, its bytes or a
+            binary file object. File objects are read from their current
+            position and rewound afterwards when they support seeking.
 
     Raises:
         ValueError: If macros are detected.
-        FileNotFoundError: If ``path`` does not exist.
+        FileNotFoundError: If ``source`` is a path that does not exist.
     """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        _scan_for_macros(BytesIO(source))
+        return
+    if not isinstance(source, (str, Path)):
+        start = source.tell() if source.seekable() else None
+        _scan_for_macros(source)
+        if start is not None:
+            source.seek(start)
+        return
+    path = Path(source)
     if not path.exists() or not path.is_file():
         raise FileNotFoundError(str(path))
     if path.suffix.lower() in {".docm", ".dotm"}:
         raise ValueError("Macro-enabled documents are not allowed")
+    with path.open("rb") as f:
+        _scan_for_macros(f)
+
+
+def _scan_for_macros(f: IO[bytes]) -> None:
+    """Raise ``ValueError`` if the stream ``f`` mentions a macro part."""
 
     max_len = max(len(p) for p in MACRO_PATTERNS)
-    with path.open("rb") as f:
-        tail = b""
-        for chunk in iter(lambda: f.read(4096), b""):
-            data = (tail + chunk).lower()
-            for pattern in MACRO_PATTERNS:
-                if pattern in data:
-                    raise ValueError("Macro-enabled documents are not allowed")
-            tail = data[-(max_len - 1) :]
+    tail = b""
+    for chunk in iter(lambda: f.read(4096), b""):
+        data = (tail + chunk).lower()
+        for pattern in MACRO_PATTERNS:
+            if pattern in data:
+                raise ValueError("Macro-enabled documents are not allowed")
+        tail = data[-(max_len - 1) :]
 
 
 def cleanup_uploads(*paths: Path) -> None:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from docx.document import Document
 
-from .processing import extract_fields
+from .processing import WorksheetText, extract_fields
 
 MANDATORY_PLACEHOLDERS = [
     "{Applicant name}",
@@ -47,11 +47,11 @@ def _find_question_answer(paragraphs: list[str], index: int) -> str:
     return ""
 
 
-def validate_mandatory_fields(doc: Document) -> None:
+def validate_mandatory_fields(doc: Document | WorksheetText) -> None:
     """Check worksheet for required fields and questions.
 
     Args:
-        doc: Worksheet document to validate.
+        doc: Worksheet document to validate, or its extracted text.
 
     Raises:
         ValueError: If any mandatory field or question is missing.
@@ -62,7 +62,10 @@ def validate_mandatory_fields(doc: Document) -> None:
         if not values.get(key):
             raise ValueError(f"Missing field: {key}")
 
-    texts = [p.text.strip() for p in doc.paragraphs]
+    if isinstance(doc, WorksheetText):
+        texts = [text.strip() for text in doc.paragraphs]
+    else:
+        texts = [p.text.strip() for p in doc.paragraphs]
     for q in MANDATORY_QUESTIONS:
         for idx, text in enumerate(texts):
             if (
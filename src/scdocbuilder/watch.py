@@ -0,0 +1,225 @@
+"""Fill worksheets as they arrive in a watched directory."""
+
+from __future__ import annotations
+
+import logging
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from . import PreparedTemplate, prepare_template
+from .batch import (
+    BatchManifest,
+    BatchResult,
+    BatchTask,
+    discover_worksheets,
+    process_worksheet,
+)
+
+
+class FolderWatcher:
+    """Poll a directory and fill each new worksheet with a preloaded template.
+
+    The template is parsed once and re-parsed only when its file changes. A
+    worksheet is processed once its size and modification time have stayed
+    the same for ``settle`` seconds across two polls, so files that are still
+    being copied in are left alone. A worksheet that is replaced later is
+    processed again.
+
+    Template changes settle the same way, and worksheets wait while they do.
+    If the new template cannot be read, the error is logged and the last good
+    template stays in use. Processed worksheets are recorded in a
+    :class:`~scdocbuilder.batch.BatchManifest` in the output directory, so a
+    restarted watcher does not fill them again.
+    """
+
+    def __init__(
+        self,
+        template: Path,
+        directory: Path,
+        output_dir: Optional[Path] = None,
+        schema: Optional[dict[str, str]] = None,
+        settle: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Prepare ``template`` and start watching ``directory``.
+
+        Args:
+            template: Template ``.docx`` to fill.
+            directory: Directory to watch for worksheet ``.docx`` files.
+            output_dir: Where outputs are written; defaults to ``directory``.
+            schema: Optional placeholder mapping.
+            settle: Seconds a file must stay unchanged before it is read.
+            clock: Monotonic time source.
+
+        Raises:
+            FileNotFoundError: If ``template`` or ``directory`` is missing.
+            ValueError: If ``template`` is not a valid ``.docx`` file.
+        """
+
+        if not directory.is_dir():
+            raise FileNotFoundError(str(directory))
+        self.template = template
+        self.directory = directory
+        self.output_dir = output_dir or directory
+        self.schema = schema
+        self.settle = settle
+        self._clock = clock
+        self._prepared = prepare_template(template, schema)
+        self._template_stamp: Optional[tuple[int, int]] = self._stamp(template)
+        # A changed template's signature and when it was first seen.
+        self._template_pending: Optional[tuple[tuple[int, int], float]] = None
+        self._manifest = self._open_manifest()
+        # Worksheet -> (size, mtime) and when that signature was first seen.
+        self._pending: dict[Path, tuple[tuple[int, int], float]] = {}
+        self._done: dict[Path, tuple[int, int]] = {}
+        # Outputs written so far, and files already reported as skipped.
+        self._outputs = self._manifest.outputs()
+        self._skipped: set[Path] = set()
+
+    @staticmethod
+    def _stamp(path: Path) -> tuple[int, int]:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def _open_manifest(self) -> BatchManifest:
+        return BatchManifest(
+            self.output_dir / BatchManifest.FILENAME, self.template, self.schema
+        )
+
+    def _template(self) -> Optional[PreparedTemplate]:
+        """Return the template to fill with, or ``None`` while it is changing.
+
+        A changed template is reloaded once it has settled. If it is missing
+        or cannot be loaded, the last good template is kept.
+        """
+
+        try:
+            stamp = self._stamp(self.template)
+        except OSError as exc:
+            if self._template_stamp is not None:
+                logging.error("Keeping the previous template: %s", exc)
+            self._template_stamp = self._template_pending = None
+            return self._prepared
+        if stamp == self._template_stamp:
+            self._template_pending = None
+            return self._prepared
+        now = self._clock()
+        pending = self._template_pending
+        if pending is None or pending[0] != stamp:
+            self._template_pending = (stamp, now)
+            return None
+        if now - pending[1] < self.settle:
+            return None
+
+        self._template_pending = None
+        self._template_stamp = stamp
+        try:
+            prepared = prepare_template(self.template, self.schema)
+        except (OSError, ValueError, zipfile.BadZipFile) as exc:
+            logging.error(
+                "Keeping the previous template; cannot load %s: %s",
+                self.template,
+                exc,
+            )
+            return self._prepared
+        logging.info("Reloaded template %s", self.template)
+        self._prepared = prepared
+        self._manifest = self._open_manifest()
+        self._outputs |= self._manifest.outputs()
+        return prepared
+
+    def _ready(self) -> list[Path]:
+        """Return worksheets whose contents have settled since the last poll."""
+
+        now = self._clock()
+        ready = []
+        seen = set()
+        worksheets = discover_worksheets(
+            self.directory,
+            exclude=self.output_dir,
+            known_outputs=self._outputs,
+            skipped=self._skipped,
+        )
+        for worksheet in worksheets:
+            seen.add(worksheet)
+            try:
+                stamp = self._stamp(worksheet)
+            except OSError:
+                continue
+            if self._done.get(worksheet) == stamp:
+                continue
+            previous = self._pending.get(worksheet)
+            if previous is None or previous[0] != stamp:
+                self._pending[worksheet] = (stamp, now)
+            elif now - previous[1] >= self.settle:
+                ready.append(worksheet)
+        for worksheet in set(self._pending) - seen:
+            del self._pending[worksheet]
+        for worksheet in set(self._done) - seen:
+            del self._done[worksheet]
+        return ready
+
+    def poll(self) -> list[BatchResult]:
+        """Process the worksheets that are ready and return their results.
+
+        Worksheets whose outputs are already recorded in the manifest are
+        skipped without a result. A manifest that cannot be updated is logged
+        and the results are still returned.
+        """
+
+        prepared = self._template()
+        ready = self._ready()
+        if prepared is None or not ready:
+            return []
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        for worksheet in ready:
+            stamp, _ = self._pending.pop(worksheet)
+            output = self.output_dir / (
+                f"{worksheet.stem}_{datetime.now():%Y%m%d_%H%M%S}.docx"
+            )
+            task = BatchTask(worksheet=worksheet, output=output.resolve())
+            self._done[worksheet] = stamp
+            if self._manifest.current_output(task) is not None:
+                continue
+            result = process_worksheet(prepared, task, self.schema)
+            results.append(result)
+            if result.output is not None:
+                self._outputs.add(result.output)
+            try:
+                self._manifest.record(result)
+            except OSError as exc:
+                logging.error("Cannot record %s in the manifest: %s", worksheet, exc)
+        if results:
+            try:
+                self._manifest.save()
+            except OSError as exc:
+                logging.error("Cannot save manifest %s: %s", self._manifest.path, exc)
+        return results
+
+    def run(
+        self,
+        interval: float = 1.0,
+        on_result: Optional[Callable[[BatchResult], None]] = None,
+    ) -> None:
+        """Poll every ``interval`` seconds until interrupted.
+
+        An error during a poll is logged and the next poll goes ahead, so one
+        bad worksheet or a transient disk problem does not stop the watcher.
+
+        Args:
+            interval: Seconds to sleep between polls.
+            on_result: Called with each result as it is produced.
+        """
+
+        while True:
+            try:
+                for result in self.poll():
+                    if on_result:
+                        on_result(result)
+            except Exception:
+                logging.exception("Watching %s failed; retrying", self.directory)
+            time.sleep(interval)
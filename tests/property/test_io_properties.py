@@ -50,5 +50,7 @@ def test_validate_input_files_accepts_paths(
 
     validate_input_files(t, w)
 
+    # Generated names are plain files in ``tmp_path``, so a path inside a
+    # subdirectory can never collide with one of them.
     with pytest.raises(FileNotFoundError):
-        validate_input_files(t, tmp_path / "missing.docx")
+        validate_input_files(t, tmp_path / "absent" / "missing.docx")
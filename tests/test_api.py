@@ -1,6 +1,7 @@
+from io import BytesIO
 from pathlib import Path
 from datetime import datetime, tzinfo
-from typing import Any
+from typing import Any, cast
 import typing
 import pytest
 
@@ -10,7 +11,8 @@ else:
     pytest.importorskip("docx")
     from docx import Document
 
-from scdocbuilder import fill_template
+import scdocbuilder
+from scdocbuilder import fill_template, prepare_template
 
 
 def test_fill_template_writes_output(tmp_path: Path) -> None:
@@ -70,3 +72,108 @@ def test_fill_template_uses_default_output(tmp_path: Path, monkeypatch: Any) ->
     expected = template.with_name("t_20200102_030405.docx")
     assert result == expected
     assert expected.exists()
+
+
+def test_fill_template_with_prepared_template(tmp_path: Path, monkeypatch: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name} {Airplane model}")
+    doc.save(str(template))
+    prepared = prepare_template(template)
+
+    loaded: list[Path] = []
+    original_load = scdocbuilder.load_document
+
+    def spy(path: Path) -> Any:
+        loaded.append(Path(path))
+        return original_load(path)
+
+    monkeypatch.setattr(scdocbuilder, "load_document", spy)
+    for name in ("Foo", "Baz"):
+        worksheet = tmp_path / f"{name}.docx"
+        ws_doc = Document()
+        ws_doc.add_paragraph(f"Applicant name: {name}")
+        ws_doc.add_paragraph("Airplane model: Bar")
+        ws_doc.add_paragraph("Question 15:")
+        ws_doc.add_paragraph("Ans15")
+        ws_doc.add_paragraph("Question 16:")
+        ws_doc.add_paragraph("Ans16")
+        ws_doc.add_paragraph("Question 17:")
+        ws_doc.add_paragraph("Ans17")
+        ws_doc.save(str(worksheet))
+        output = fill_template(prepared, worksheet, tmp_path / f"out_{name}.docx")
+        assert Document(str(output)).paragraphs[0].text == f"{name} Bar"
+
+    assert template not in loaded
+    assert prepared.document.paragraphs[0].text == "{Applicant name} {Airplane model}"
+
+
+def test_fill_template_in_memory_returns_bytes(tmp_path: Path) -> None:
+    template = BytesIO()
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(template)
+    worksheet = BytesIO()
+    ws = Document()
+    for line in (
+        "Applicant name: Foo",
+        "Airplane model: Bar",
+        "Question 15:",
+        "Ans15",
+        "Question 16:",
+        "Ans16",
+        "Question 17:",
+        "Ans17",
+    ):
+        ws.add_paragraph(line)
+    ws.save(worksheet)
+
+    result = fill_template(template.getvalue(), worksheet.getvalue())
+    typing.assert_type(result, bytes)
+    assert isinstance(result, bytes)
+    assert Document(BytesIO(result)).paragraphs[0].text == "Foo"
+
+    prepared = prepare_template(BytesIO(template.getvalue()))
+    assert prepared.path is None
+    again = fill_template(prepared, BytesIO(worksheet.getvalue()))
+    assert isinstance(again, bytes)
+    assert Document(BytesIO(again)).paragraphs[0].text == "Foo"
+
+    out = fill_template(template.getvalue(), worksheet.getvalue(), tmp_path / "o.docx")
+    typing.assert_type(out, Path)
+    assert out == tmp_path / "o.docx"
+    assert list(tmp_path.iterdir()) == [out]
+
+
+def test_prepared_template_keeps_its_schema(tmp_path: Path) -> None:
+    template = BytesIO()
+    doc = Document()
+    doc.add_paragraph("{Pilot}")
+    doc.save(template)
+    worksheet = BytesIO()
+    ws = Document()
+    for line in (
+        "Pilot: Ada",
+        "Applicant name: Foo",
+        "Airplane model: Bar",
+        "Question 15:",
+        "Ans15",
+        "Question 16:",
+        "Ans16",
+        "Question 17:",
+        "Ans17",
+    ):
+        ws.add_paragraph(line)
+    ws.save(worksheet)
+    schema = {"Pilot:": "{Pilot}"}
+
+    prepared = prepare_template(template.getvalue(), schema)
+    assert prepared.schema == schema
+    for given in (None, dict(schema)):
+        result = fill_template(prepared, worksheet.getvalue(), schema=given)
+        assert Document(BytesIO(cast(bytes, result))).paragraphs[0].text == "Ada"
+
+    with pytest.raises(ValueError):
+        fill_template(
+            prepare_template(template.getvalue()), worksheet.getvalue(), schema=schema
+        )
@@ -0,0 +1,236 @@
+import json
+import logging
+import multiprocessing
+import os
+import typing
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from scdocbuilder.batch import (
+    BatchArchive,
+    BatchJournal,
+    BatchResult,
+    BatchTask,
+    ErrorCode,
+    discover_worksheets,
+    estimate_footprint,
+    run_batch,
+)
+
+
+def _touch(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+    return path
+
+
+def test_discover_worksheets_sorted_and_skips_generated(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    _touch(tmp_path / "b.docx")
+    _touch(tmp_path / "a.docx")
+    _touch(tmp_path / "a_20240101_120000.docx")
+    _touch(tmp_path / "~$a.docx")
+    _touch(tmp_path / "notes.txt")
+    _touch(tmp_path / "sub" / "c.docx")
+
+    with caplog.at_level(logging.WARNING):
+        found = discover_worksheets(tmp_path, exclude=tmp_path)
+    assert [p.name for p in found] == ["a.docx", "b.docx"]
+    assert "a_20240101_120000.docx" in caplog.text
+    assert "~$a.docx" in caplog.text
+
+
+def test_discover_worksheets_keeps_output_names_elsewhere(tmp_path: Path) -> None:
+    _touch(tmp_path / "a_20240101_120000.docx")
+    _touch(tmp_path / "~$a.docx")
+
+    found = discover_worksheets(tmp_path, exclude=tmp_path / "out")
+    assert [p.name for p in found] == ["a_20240101_120000.docx"]
+    assert discover_worksheets(tmp_path) == found
+
+
+def test_discover_worksheets_skips_known_outputs(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    _touch(tmp_path / "a.docx")
+    output = _touch(tmp_path / "a-filled.docx")
+    skipped: set[Path] = set()
+
+    with caplog.at_level(logging.WARNING):
+        for _ in range(2):
+            found = discover_worksheets(
+                tmp_path, exclude=tmp_path, known_outputs=[output], skipped=skipped
+            )
+            assert [p.name for p in found] == ["a.docx"]
+    assert skipped == {output}
+    assert caplog.text.count("a-filled.docx") == 1
+
+
+def test_discover_worksheets_recursive_excludes_output(tmp_path: Path) -> None:
+    _touch(tmp_path / "a.docx")
+    _touch(tmp_path / "sub" / "c.docx")
+    _touch(tmp_path / "out" / "x.docx")
+
+    found = discover_worksheets(tmp_path, recursive=True, exclude=tmp_path / "out")
+    assert [p.relative_to(tmp_path).as_posix() for p in found] == [
+        "a.docx",
+        "sub/c.docx",
+    ]
+
+
+def test_discover_worksheets_shards_are_disjoint(tmp_path: Path) -> None:
+    for i in range(20):
+        _touch(tmp_path / f"w{i:02}.docx")
+
+    everything = discover_worksheets(tmp_path)
+    shards = [discover_worksheets(tmp_path, shard=(i, 3)) for i in (1, 2, 3)]
+    combined = [p for shard in shards for p in shard]
+    assert sorted(combined) == everything
+    assert len(set(combined)) == len(everything)
+    assert shards[0] == discover_worksheets(tmp_path, shard=(1, 3))
+
+
+def test_discover_worksheets_rejects_bad_shard(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        discover_worksheets(tmp_path, shard=(0, 2))
+
+
+def test_batch_archive_moves_outputs_and_writes_index(tmp_path: Path) -> None:
+    root = tmp_path / "stage"
+    output = _touch(root / "sub" / "a_20240101_120000.docx")
+    output.write_bytes(b"docx")
+    archive = BatchArchive(tmp_path / "out.zip", root, index=True)
+    ok = BatchResult(worksheet=Path("a.docx"), output=output)
+    failed = BatchResult(
+        worksheet=Path("b.docx"), error_code=ErrorCode.EVALID, error="bad"
+    )
+    archive.add(ok)
+    archive.add(failed)
+    archive.close()
+
+    assert not output.exists()
+    assert ok.output == Path("sub/a_20240101_120000.docx")
+    with zipfile.ZipFile(tmp_path / "out.zip") as zf:
+        assert zf.read("sub/a_20240101_120000.docx") == b"docx"
+        index = [json.loads(x) for x in zf.read("results.jsonl").splitlines()]
+    assert [r["status"] for r in index] == ["ok", "error"]
+    assert index[0]["output"] == "sub/a_20240101_120000.docx"
+
+
+def test_batch_journal_ignores_other_template(tmp_path: Path) -> None:
+    template = _touch(tmp_path / "t.docx")
+    output = _touch(tmp_path / "a_out.docx")
+    task = BatchTask(worksheet=tmp_path / "a.docx", output=output)
+    journal_path = tmp_path / BatchJournal.FILENAME
+
+    journal = BatchJournal(journal_path, template)
+    journal.record(BatchResult(worksheet=task.worksheet, output=output))
+    journal.close()
+    with journal_path.open("a") as fh:
+        fh.write('{"worksheet": "trunc')
+
+    resumed = BatchJournal(journal_path, template, resume=True)
+    assert resumed.current_output(task) == output
+    second = _touch(tmp_path / "b_out.docx")
+    resumed.record(BatchResult(worksheet=tmp_path / "b.docx", output=second))
+    resumed.close()
+    again = BatchJournal(journal_path, template, resume=True)
+    assert set(again.done.values()) == {output, second}
+    again.close()
+
+    template.write_bytes(b"changed")
+    other = BatchJournal(journal_path, template, resume=True)
+    assert other.current_output(task) is None
+    other.close()
+
+
+def test_estimate_footprint_scales_xml(tmp_path: Path) -> None:
+    path = tmp_path / "w.docx"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", "<w/>" * 1000)
+        zf.writestr("word/media/image1.png", b"\0" * 1000)
+
+    estimate = estimate_footprint(path)
+    assert estimate > 4000 + path.stat().st_size
+    assert estimate_footprint(_touch(tmp_path / "empty.docx")) == 0
+
+
+def test_run_batch_tight_memory_budget_keeps_order(tmp_path: Path) -> None:
+    from docx import Document
+
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    tasks = []
+    for name in "abcd":
+        ws = Document()
+        ws.add_paragraph(f"Applicant name: {name}")
+        ws.add_paragraph("Airplane model: Bar")
+        for q in (15, 16, 17):
+            ws.add_paragraph(f"Question {q}:")
+            ws.add_paragraph("Answer")
+        ws.save(str(tmp_path / f"{name}.docx"))
+        tasks.append(
+            BatchTask(
+                worksheet=tmp_path / f"{name}.docx",
+                output=tmp_path / "out" / f"{name}_out.docx",
+            )
+        )
+
+    results = list(run_batch(template, tasks, jobs=3, max_memory=1))
+
+    assert [r.worksheet.stem for r in results] == list("abcd")
+    assert all(r.ok for r in results)
+    texts = [Document(str(r.output)).paragraphs[0].text for r in results]
+    assert texts == list("abcd")
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="workers must inherit the patched module",
+)
+def test_run_batch_isolates_crashing_worker(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from docx import Document
+
+    from scdocbuilder import batch
+
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    tasks = []
+    for name in ("a", "b", "crash", "c", "d"):
+        ws = Document()
+        ws.add_paragraph(f"Applicant name: {name}")
+        ws.add_paragraph("Airplane model: Bar")
+        for q in (15, 16, 17):
+            ws.add_paragraph(f"Question {q}:")
+            ws.add_paragraph("Answer")
+        ws.save(str(tmp_path / f"{name}.docx"))
+        tasks.append(
+            BatchTask(
+                worksheet=tmp_path / f"{name}.docx",
+                output=tmp_path / "out" / f"{name}_out.docx",
+            )
+        )
+    original = batch.process_worksheet
+
+    def crashing(
+        prepared: typing.Any, task: BatchTask, schema: typing.Any
+    ) -> BatchResult:
+        if task.worksheet.stem == "crash":
+            os._exit(1)
+        return original(prepared, task, schema)
+
+    monkeypatch.setattr(batch, "process_worksheet", crashing)
+    results = list(run_batch(template, tasks, jobs=3))
+
+    assert [r.worksheet.stem for r in results] == ["a", "b", "crash", "c", "d"]
+    assert [r.ok for r in results] == [True, True, False, True, True]
+    assert results[2].error_code == ErrorCode.EREPLACE
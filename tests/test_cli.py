@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, tzinfo
+from io import BytesIO
 from pathlib import Path
 from typing import Any, cast
 import logging
@@ -8,6 +9,7 @@ from logging.handlers import RotatingFileHandler
 import json
 import runpy
 import sys
+import zipfile
 import scdocbuilder.cli
 
 import pytest
@@ -538,7 +540,7 @@ def test_main_replacement_failure_exit_code(tmp_path: Path, monkeypatch: Any) ->
     def boom(*args: Any, **kwargs: Any) -> None:
         raise RuntimeError("boom")
 
-    monkeypatch.setattr("scdocbuilder.processing.replace_placeholders", boom)
+    monkeypatch.setattr("scdocbuilder.processing.fill_document", boom)
 
     with pytest.raises(SystemExit) as exc:
         main(
@@ -557,3 +559,496 @@ def test_cli_shows_completion_script() -> None:
     script = scdocbuilder.cli._generate_completion("bash")
     assert "--template" in script
     assert "--worksheet" in script
+
+
+def _write_worksheet(path: Path, applicant: str = "Foo") -> None:
+    ws = Document()
+    ws.add_paragraph(f"Applicant name: {applicant}")
+    ws.add_paragraph("Airplane model: Bar")
+    ws.add_paragraph("Question 15:")
+    ws.add_paragraph("Ans15")
+    ws.add_paragraph("Question 16:")
+    ws.add_paragraph("Ans16")
+    ws.add_paragraph("Question 17:")
+    ws.add_paragraph("Ans17")
+    ws.save(str(path))
+
+
+def test_parse_args_rejects_zero_jobs() -> None:
+    with pytest.raises(SystemExit):
+        parse_args(["--template", "t.docx", "--batch", "b", "--jobs", "0"])
+
+
+@pytest.mark.parametrize("jobs", ["1", "3"])
+def test_main_batch_jobs_prints_in_order(
+    tmp_path: Path, capsys: Any, jobs: str
+) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    names = ["c", "a", "b", "d"]
+    for name in names:
+        _write_worksheet(batch / f"{name}.docx", applicant=name.upper())
+    out_dir = tmp_path / "out"
+
+    main(
+        [
+            "--template",
+            str(template),
+            "--batch",
+            str(batch),
+            "--output",
+            str(out_dir),
+            "--jobs",
+            jobs,
+        ]
+    )
+
+    printed = [Path(line) for line in capsys.readouterr().out.split()]
+    assert [p.name.split("_")[0] for p in printed] == sorted(names)
+    for path in printed:
+        expected = path.name.split("_")[0].upper()
+        assert Document(str(path)).paragraphs[0].text == expected
+
+
+def test_main_batch_jobs_failure_exit_code(tmp_path: Path) -> None:
+    template = tmp_path / "t.docx"
+    Document().save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx")
+    bad = Document()
+    bad.add_paragraph("Applicant name: Foo")
+    bad.save(str(batch / "b.docx"))
+
+    with pytest.raises(SystemExit) as exc:
+        main(["--template", str(template), "--batch", str(batch), "--jobs", "2"])
+    assert exc.value.code == ErrorCode.EVALID
+
+
+def test_main_batch_results_jsonl(tmp_path: Path, capsys: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx")
+    bad = Document()
+    bad.add_paragraph("Applicant name: Foo")
+    bad.save(str(batch / "b.docx"))
+
+    with pytest.raises(SystemExit) as exc:
+        main(
+            [
+                "--template",
+                str(template),
+                "--batch",
+                str(batch),
+                "--output",
+                str(tmp_path / "out"),
+                "--jobs",
+                "1",
+                "--results",
+                "jsonl",
+            ]
+        )
+    assert exc.value.code == ErrorCode.EVALID
+
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [Path(r["input"]).name for r in records] == ["a.docx", "b.docx"]
+    ok, failed = records
+    assert ok["status"] == "ok"
+    assert ok["error_code"] == 0
+    assert Path(ok["output"]).exists()
+    assert ok["fields"] > 0
+    assert set(ok["timings"]) == {"extract", "fill", "save"}
+    assert failed["status"] == "error"
+    assert failed["error_code"] == ErrorCode.EVALID
+    assert failed["output"] is None
+    assert failed["error"]
+
+
+def test_main_batch_incremental_skips_unchanged(tmp_path: Path, capsys: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx", applicant="A")
+    _write_worksheet(batch / "b.docx", applicant="B")
+    out_dir = tmp_path / "out"
+    argv = [
+        "--template",
+        str(template),
+        "--batch",
+        str(batch),
+        "--output",
+        str(out_dir),
+        "--jobs",
+        "1",
+        "--incremental",
+        "--results",
+        "jsonl",
+    ]
+
+    def run() -> list[dict[str, Any]]:
+        main(argv)
+        return [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+
+    first = run()
+    assert [r["status"] for r in first] == ["ok", "ok"]
+    assert (out_dir / ".scdocbuilder-manifest.json").exists()
+
+    second = run()
+    assert [r["status"] for r in second] == ["skipped", "skipped"]
+    assert [r["output"] for r in second] == [r["output"] for r in first]
+
+    _write_worksheet(batch / "b.docx", applicant="Changed")
+    third = run()
+    assert [r["status"] for r in third] == ["skipped", "ok"]
+    assert Document(third[1]["output"]).paragraphs[0].text == "Changed"
+
+    doc.add_paragraph("extra")
+    doc.save(str(template))
+    assert [r["status"] for r in run()] == ["ok", "ok"]
+
+
+def test_main_batch_fills_output_like_names_in_another_directory(
+    tmp_path: Path, capsys: Any
+) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "scan_20240101_120000.docx", applicant="A")
+    out_dir = tmp_path / "out"
+
+    main(["--template", str(template), "--batch", str(batch), "--output", str(out_dir)])
+
+    (line,) = capsys.readouterr().out.split()
+    assert Path(line).parent == out_dir.resolve()
+    assert Document(line).paragraphs[0].text == "A"
+
+
+def test_main_batch_in_place_skips_recorded_outputs(
+    tmp_path: Path, capsys: Any, caplog: Any
+) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx", applicant="A")
+    argv = ["--template", str(template), "--batch", str(batch), "--incremental"]
+
+    main(argv)
+    (output,) = capsys.readouterr().out.split()
+    with caplog.at_level(logging.WARNING):
+        main(argv)
+    assert capsys.readouterr().out.split() == [output]
+    assert f"Skipping {output}: a recorded output" in caplog.text
+
+
+@pytest.mark.parametrize("value", ["3/2", "0/1", "x", "1/2/3"])
+def test_parse_args_rejects_bad_shard(value: str) -> None:
+    with pytest.raises(SystemExit):
+        parse_args(["--template", "t.docx", "--batch", "b", "--shard", value])
+
+
+def test_main_batch_recursive_mirrors_subdirectories(
+    tmp_path: Path, capsys: Any
+) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    (batch / "x").mkdir(parents=True)
+    (batch / "y").mkdir()
+    _write_worksheet(batch / "x" / "w.docx", applicant="X")
+    _write_worksheet(batch / "y" / "w.docx", applicant="Y")
+
+    main(
+        [
+            "--template",
+            str(template),
+            "--batch",
+            str(batch),
+            "--recursive",
+            "--jobs",
+            "1",
+        ]
+    )
+    printed = [Path(line) for line in capsys.readouterr().out.split()]
+    assert [p.parent.name for p in printed] == ["x", "y"]
+    assert [Document(str(p)).paragraphs[0].text for p in printed] == ["X", "Y"]
+
+    main(["--template", str(template), "--batch", str(batch), "--recursive"])
+    assert len(capsys.readouterr().out.split()) == 2
+
+
+def test_main_batch_archive(tmp_path: Path, capsys: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx", applicant="A")
+    _write_worksheet(batch / "b.docx", applicant="B")
+    archive = tmp_path / "out.zip"
+
+    main(
+        [
+            "--template",
+            str(template),
+            "--batch",
+            str(batch),
+            "--archive",
+            str(archive),
+            "--jobs",
+            "2",
+            "--results",
+            "jsonl",
+        ]
+    )
+
+    records = [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+    assert sorted(p.name for p in batch.iterdir()) == ["a.docx", "b.docx"]
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+        assert names[-1] == "results.jsonl"
+        assert names[:-1] == [r["output"] for r in records]
+        texts = [
+            Document(BytesIO(zf.read(name))).paragraphs[0].text for name in names[:-1]
+        ]
+    assert texts == ["A", "B"]
+
+
+def test_parse_args_archive_rejects_output() -> None:
+    with pytest.raises(SystemExit):
+        parse_args(
+            [
+                "--template",
+                "t.docx",
+                "--batch",
+                "b",
+                "--archive",
+                "o.zip",
+                "--output",
+                "x",
+            ]
+        )
+
+
+def test_main_batch_resume_skips_journaled(tmp_path: Path, capsys: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx", applicant="A")
+    bad = Document()
+    bad.add_paragraph("Applicant name: B")
+    bad.save(str(batch / "b.docx"))
+    out_dir = tmp_path / "out"
+    argv = [
+        "--template",
+        str(template),
+        "--batch",
+        str(batch),
+        "--output",
+        str(out_dir),
+        "--jobs",
+        "1",
+        "--results",
+        "jsonl",
+    ]
+
+    with pytest.raises(SystemExit):
+        main(argv)
+    first = [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+    assert [r["status"] for r in first] == ["ok", "error"]
+    assert (out_dir / ".scdocbuilder-journal.jsonl").exists()
+
+    _write_worksheet(batch / "b.docx", applicant="B")
+    main([*argv, "--resume"])
+    resumed = [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+    assert [r["status"] for r in resumed] == ["skipped", "ok"]
+    assert resumed[0]["output"] == first[0]["output"]
+
+    main(argv)
+    fresh = [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+    assert [r["status"] for r in fresh] == ["ok", "ok"]
+
+
+def test_main_batch_shards_keep_separate_state(tmp_path: Path, capsys: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    for name in "abcdef":
+        _write_worksheet(batch / f"{name}.docx", applicant=name)
+
+    def run(shard: str, *extra: str) -> list[dict[str, Any]]:
+        main(
+            [
+                "--template",
+                str(template),
+                "--batch",
+                str(batch),
+                "--jobs",
+                "1",
+                "--incremental",
+                "--results",
+                "jsonl",
+                "--shard",
+                shard,
+                *extra,
+            ]
+        )
+        return [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+
+    first = run("1/2")
+    second = run("2/2")
+    assert len(first) + len(second) == 6
+    names = sorted(p.name for p in batch.glob(".scdocbuilder-*"))
+    assert names == [
+        ".scdocbuilder-journal-1of2.jsonl",
+        ".scdocbuilder-journal-2of2.jsonl",
+        ".scdocbuilder-manifest-1of2.json",
+        ".scdocbuilder-manifest-2of2.json",
+    ]
+    assert {r["status"] for r in run("1/2")} == {"skipped"}
+    assert {r["status"] for r in run("2/2", "--resume")} == {"skipped"}
+
+
+@pytest.mark.parametrize("mode", ["--worksheet", "--batch"])
+def test_main_dry_run_scans_without_filling(
+    tmp_path: Path, capsys: Any, monkeypatch: Any, mode: str
+) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name} / {TC number}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    worksheet = batch / "w.docx"
+    _write_worksheet(worksheet)
+
+    def fail(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("dry run must not fill")
+
+    monkeypatch.setattr("scdocbuilder.processing.fill_document", fail)
+    monkeypatch.setattr("scdocbuilder.batch.fill_compiled", fail)
+    target = str(worksheet if mode == "--worksheet" else batch)
+    main(["--template", str(template), mode, target, "--dry-run", "--jobs", "1"])
+
+    diff = json.loads(capsys.readouterr().out)
+    assert diff["{Applicant name}"]["status"] == "replace"
+    assert diff["{Applicant name}"]["locations"][0]["part"] == "/word/document.xml"
+    assert diff["{Airplane model}"]["status"] == "unused"
+    assert diff["{TC number}"] == {
+        "old": "{TC number}",
+        "new": None,
+        "status": "missing",
+        "locations": [{"part": "/word/document.xml", "path": [0, 0]}],
+    }
+    assert sorted(p.name for p in batch.iterdir()) == ["w.docx"]
+
+
+def test_main_dry_run_jsonl_includes_diff(tmp_path: Path, capsys: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "w.docx", applicant="A")
+    main(
+        [
+            "--template",
+            str(template),
+            "--batch",
+            str(batch),
+            "--dry-run",
+            "--jobs",
+            "1",
+            "--results",
+            "jsonl",
+        ]
+    )
+
+    (record,) = [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+    assert record["status"] == "ok"
+    assert record["diff"]["{Applicant name}"]["new"] == "A"
+    assert record["diff"]["{Applicant name}"]["status"] == "replace"
+
+
+def test_main_batch_keep_going(tmp_path: Path, capsys: Any, caplog: Any) -> None:
+    template = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{Applicant name}")
+    doc.save(str(template))
+    batch = tmp_path / "b"
+    batch.mkdir()
+    _write_worksheet(batch / "a.docx", applicant="A")
+    bad = Document()
+    bad.add_paragraph("Applicant name: B")
+    bad.save(str(batch / "b.docx"))
+    _write_worksheet(batch / "c.docx", applicant="C")
+
+    with pytest.raises(SystemExit) as exc:
+        main(
+            [
+                "--template",
+                str(template),
+                "--batch",
+                str(batch),
+                "--output",
+                str(tmp_path / "out"),
+                "--jobs",
+                "2",
+                "--keep-going",
+            ]
+        )
+    assert exc.value.code == ErrorCode.EVALID
+
+    printed = [Path(line) for line in capsys.readouterr().out.split()]
+    assert [p.name.split("_")[0] for p in printed] == ["a", "c"]
+    summaries = [
+        json.loads(r.getMessage())
+        for r in caplog.records
+        if "batch_summary" in r.getMessage()
+    ]
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert (summary["succeeded"], summary["failed"]) == (2, 1)
+    assert Path(summary["failures"][0]["worksheet"]).name == "b.docx"
+    assert summary["failures"][0]["error_code"] == ErrorCode.EVALID
+
+
+@pytest.mark.parametrize(
+    "value,expected", [("2G", 2 * 1024**3), ("512mb", 512 * 1024**2), ("100", 100)]
+)
+def test_parse_args_max_memory(value: str, expected: int) -> None:
+    args = parse_args(["--template", "t.docx", "--batch", "b", "--max-memory", value])
+    assert args.max_memory == expected
+
+
+@pytest.mark.parametrize("value", ["", "G", "-1G", "lots", "inf", "nan", "1e400G"])
+def test_parse_args_rejects_bad_max_memory(value: str) -> None:
+    with pytest.raises(SystemExit):
+        parse_args(["--template", "t.docx", "--batch", "b", "--max-memory", value])
@@ -1,12 +1,19 @@
 import asyncio
+import io
+import json
 import sys
+import threading
+import time
 import types
 import typing
+import zipfile
 from pathlib import Path
 
+import pytest
+
 from docx import Document
-from fastapi import UploadFile
-from fastapi.responses import FileResponse
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import Response
 
 
 def _load_api() -> types.ModuleType:
@@ -58,11 +65,16 @@ def _upload(path: Path) -> UploadFile:
 
 def test_generate_endpoint_returns_doc(tmp_path: Path) -> None:
     template, worksheet = _make_docs(tmp_path)
+    before = set(api.OUTPUT_DIR.iterdir())
     resp = asyncio.run(api.generate(_upload(template), _upload(worksheet)))
     assert resp.status_code == 200
-    file_resp = typing.cast(FileResponse, resp)
-    data = Path(file_resp.path).read_bytes()
-    assert data.startswith(b"PK")
+    assert resp.body.startswith(b"PK")
+    assert resp.media_type == api.DOCX_MIME
+    disposition = resp.headers["content-disposition"]
+    assert disposition.startswith('attachment; filename="t_')
+    assert Document(io.BytesIO(resp.body)).paragraphs[0].text == "Foo Bar"
+    # Nothing is written to disk on the way.
+    assert set(api.OUTPUT_DIR.iterdir()) == before
 
 
 def test_generate_endpoint_returns_html(tmp_path: Path) -> None:
@@ -81,3 +93,429 @@ def test_web_generate_returns_link(tmp_path: Path) -> None:
     resp = asyncio.run(api.web_generate(_upload(template), _upload(worksheet)))
     assert resp.status_code == 200
     assert b"Download result" in resp.body
+
+
+def test_settings_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SCDOCBUILDER_POOL", "Process")
+    monkeypatch.setenv("SCDOCBUILDER_WORKERS", "3")
+    assert api.Settings.from_env() == api.Settings(pool="process", workers=3)
+
+    monkeypatch.setenv("SCDOCBUILDER_WORKERS", "0")
+    with pytest.raises(ValueError):
+        api.Settings.from_env()
+    monkeypatch.setenv("SCDOCBUILDER_WORKERS", "2")
+    monkeypatch.setenv("SCDOCBUILDER_POOL", "fiber")
+    with pytest.raises(ValueError):
+        api.Settings.from_env()
+
+
+def test_generate_runs_off_the_event_loop(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    threads = []
+    original = api._fill_uploads
+
+    def tracking(*args: typing.Any) -> typing.Any:
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    monkeypatch.setattr(api, "_fill_uploads", tracking)
+    resp = asyncio.run(api.generate(_upload(template), _upload(worksheet)))
+
+    assert resp.status_code == 200
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_generate_rejects_oversized_upload_without_leftovers(
+    tmp_path: Path,
+) -> None:
+    template, _ = _make_docs(tmp_path)
+    big = UploadFile(io.BytesIO(b"\0" * (api.MAX_SIZE + 1)), filename="w.docx")
+    before = set(api.OUTPUT_DIR.iterdir())
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.generate(_upload(template), big))
+
+    assert exc.value.status_code == 413
+    assert set(api.OUTPUT_DIR.iterdir()) == before
+
+
+def _asgi_post(
+    path: str, chunks: list[bytes], headers: list[tuple[bytes, bytes]]
+) -> tuple[list[dict[str, typing.Any]], int]:
+    """POST ``chunks`` through the upload limit to an app that reads them all.
+
+    Returns the messages sent back and how many chunks the app received.
+    """
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "query_string": b"",
+        "headers": headers,
+    }
+    pending = [
+        {"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+        for i, c in enumerate(chunks)
+    ]
+    read = []
+    sent: list[dict[str, typing.Any]] = []
+
+    async def receive() -> dict[str, typing.Any]:
+        return pending.pop(0)
+
+    async def send(message: dict[str, typing.Any]) -> None:
+        sent.append(message)
+
+    async def app(scope: typing.Any, receive: typing.Any, send: typing.Any) -> None:
+        while True:
+            message = await receive()
+            read.append(message)
+            if not message.get("more_body"):
+                break
+        await Response()(scope, receive, send)
+
+    asyncio.run(api._UploadLimitMiddleware(app)(scope, receive, send))
+    return sent, len(read)
+
+
+@pytest.mark.parametrize(
+    "path,length,rejected",
+    [
+        ("/generate", "100", False),
+        ("/generate", "99999999999", True),
+        ("/health", "99999999999", False),
+        ("/templates/abc/generate", "99999999999", True),
+    ],
+)
+def test_content_length_is_checked_before_reading(
+    path: str, length: str, rejected: bool
+) -> None:
+    sent, read = _asgi_post(path, [b"x"], [(b"content-length", length.encode())])
+
+    assert (sent[0]["status"] == 413) is rejected
+    assert bool(read) is not rejected
+
+
+def test_chunked_body_is_cut_off_at_the_limit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(api, "_UPLOAD_LIMITS", {"/generate": 10})
+    chunks = [b"x" * 6] * 5
+
+    with pytest.raises(HTTPException) as exc:
+        _asgi_post("/generate", chunks, [])
+
+    assert exc.value.status_code == 413
+    sent, read = _asgi_post("/health", chunks, [])
+    assert sent[0]["status"] == 200 and read == 5
+
+
+def test_registered_template_is_parsed_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path / "registry")
+    api.TEMPLATE_DIR.mkdir()
+    monkeypatch.setattr(api, "_templates", api.OrderedDict())
+    info = asyncio.run(api.register_template(_upload(template)))
+    assert info["id"] == api.hashlib.sha256(template.read_bytes()).hexdigest()
+    assert api.template_info(info["id"]) == info
+    again = asyncio.run(api.register_template(_upload(template)))
+    assert again == info
+    assert len(list(api.TEMPLATE_DIR.iterdir())) == 1
+
+    prepared = []
+    original = api.prepare_template
+
+    def counting(*args: typing.Any) -> typing.Any:
+        prepared.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(api, "prepare_template", counting)
+    for _ in range(2):
+        resp = asyncio.run(api.generate_registered(info["id"], _upload(worksheet)))
+        assert Document(io.BytesIO(resp.body)).paragraphs[0].text == "Foo Bar"
+    assert prepared == []
+
+    # An evicted template is reloaded from the registry.
+    api._templates.clear()
+    resp = asyncio.run(
+        api.generate_registered(info["id"], _upload(worksheet), html=True)
+    )
+    assert b"Foo Bar" in resp.body
+    assert len(prepared) == 1
+
+
+def test_template_cache_is_bounded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(api, "settings", api.Settings(template_cache=2))
+    monkeypatch.setattr(api, "_templates", api.OrderedDict())
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path)
+    a, b, c, d = (char * 64 for char in "abcd")
+    for template_id in (a, b, c):
+        (tmp_path / f"{template_id}.docx").write_bytes(b"")
+        api._cache_template(template_id, typing.cast(typing.Any, template_id))
+    api._registered_template(b)
+    api._cache_template(d, typing.cast(typing.Any, d))
+    assert list(api._templates) == [b, d]
+
+    # A template deleted from the store is dropped from the cache too.
+    (tmp_path / f"{b}.docx").unlink()
+    with pytest.raises(KeyError):
+        api._registered_template(b)
+    assert list(api._templates) == [d]
+
+
+def test_template_store_is_bounded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(api, "settings", api.Settings(template_store=2))
+    monkeypatch.setattr(api, "_templates", api.OrderedDict())
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path / "registry")
+    api.TEMPLATE_DIR.mkdir()
+    ids = []
+    for text in ("one", "two", "three"):
+        doc = Document()
+        doc.add_paragraph(text)
+        data = io.BytesIO()
+        doc.save(data)
+        ids.append(api._register_template(data.getvalue()))
+        # File timestamps can be coarser than the time between these calls.
+        time.sleep(0.05)
+        if text == "two":
+            api._registered_template(ids[0])
+            time.sleep(0.05)
+
+    stored = sorted(path.stem for path in api.TEMPLATE_DIR.iterdir())
+    assert stored == sorted([ids[0], ids[2]])
+    with pytest.raises(HTTPException) as exc:
+        api.template_info(ids[1])
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.parametrize("template_id", ["0" * 64, "../t", "abc"])
+def test_unknown_template_is_404(tmp_path: Path, template_id: str) -> None:
+    _, worksheet = _make_docs(tmp_path)
+    with pytest.raises(HTTPException) as exc:
+        api.template_info(template_id)
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.generate_registered(template_id, _upload(worksheet)))
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.parametrize("data", [b"not a docx", b"PK\x03\x04" + b"\0" * 64])
+def test_register_rejects_invalid_template(data: bytes) -> None:
+    upload = UploadFile(io.BytesIO(data), filename="t.docx")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.register_template(upload))
+    assert exc.value.status_code == 400
+
+
+def test_job_runs_in_background(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "_jobs", api.OrderedDict())
+    resp = asyncio.run(api.submit_job(_upload(worksheet), _upload(template)))
+    assert resp.status_code == 202
+    job_id = json.loads(resp.body)["id"]
+
+    api._jobs[job_id].future.result(timeout=30)
+    record = api.job_status(job_id)
+    assert record["status"] == "done"
+    assert record["result"] == f"/jobs/{job_id}/result"
+    assert set(record["timings"]) == {"queued", "run"}
+
+    result = api.job_result(job_id)
+    assert result.media_type == api.DOCX_MIME
+    assert Document(str(result.path)).paragraphs[0].text == "Foo Bar"
+
+
+def test_job_with_registered_template(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path)
+    monkeypatch.setattr(api, "_jobs", api.OrderedDict())
+    template_id = asyncio.run(api.register_template(_upload(template)))["id"]
+    resp = asyncio.run(api.submit_job(_upload(worksheet), template_id=template_id))
+    job_id = json.loads(resp.body)["id"]
+    api._jobs[job_id].future.result(timeout=30)
+    assert api.job_status(job_id)["status"] == "done"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.submit_job(_upload(worksheet), template_id="0" * 64))
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.submit_job(_upload(worksheet)))
+    assert exc.value.status_code == 400
+
+
+def test_failed_job_reports_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, _ = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "_jobs", api.OrderedDict())
+    bad = UploadFile(io.BytesIO(b"not a docx"), filename="w.docx")
+    resp = asyncio.run(api.submit_job(bad, _upload(template)))
+    job_id = json.loads(resp.body)["id"]
+    with pytest.raises(ValueError):
+        api._jobs[job_id].future.result(timeout=30)
+
+    record = api.job_status(job_id)
+    assert record["status"] == "failed"
+    assert record["error_code"] == 2
+    assert record["error"]
+    with pytest.raises(HTTPException) as exc:
+        api.job_result(job_id)
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        api.job_status("missing")
+    assert exc.value.status_code == 404
+
+
+def test_job_queue_is_bounded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    release = threading.Event()
+    monkeypatch.setattr(api, "_jobs", api.OrderedDict())
+    monkeypatch.setattr(api, "settings", api.Settings(job_queue=1))
+    monkeypatch.setattr(api, "_run_job", lambda *args: release.wait(30) and (0, 0))
+    try:
+        first = asyncio.run(api.submit_job(_upload(worksheet), _upload(template)))
+        assert json.loads(first.body)["status"] in {"queued", "running"}
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(api.submit_job(_upload(worksheet), _upload(template)))
+        assert exc.value.status_code == 503
+    finally:
+        release.set()
+
+
+def test_generate_batch_streams_zip_with_manifest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path)
+    bad = UploadFile(io.BytesIO(b"not a docx"), filename="bad.docx")
+
+    async def collect() -> tuple[typing.Any, list[bytes]]:
+        resp = await api.generate_batch(
+            [_upload(worksheet), bad, _upload(worksheet)], _upload(template)
+        )
+        return resp, [chunk async for chunk in resp.body_iterator]
+
+    resp, chunks = asyncio.run(collect())
+    assert resp.media_type == "application/zip"
+    assert len(chunks) > 1
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == ["w.docx", "w_2.docx", "results.jsonl"]
+    doc = Document(io.BytesIO(archive.read("w_2.docx")))
+    assert doc.paragraphs[0].text == "Foo Bar"
+    records = [json.loads(line) for line in archive.read("results.jsonl").splitlines()]
+    assert [r["status"] for r in records] == ["ok", "error", "ok"]
+    assert [r["output"] for r in records] == ["w.docx", None, "w_2.docx"]
+    assert records[1]["input"] == "bad.docx"
+    assert records[1]["error_code"] == 2
+    assert set(records[0]["timings"]) == {"extract", "fill", "save"}
+    # Same record format as the CLI --archive index.
+    assert records[0]["error"] == ""
+    assert records[0]["fields"] > 0
+    assert set(records[0]) == {
+        "input",
+        "output",
+        "status",
+        "error_code",
+        "error",
+        "fields",
+        "timings",
+    }
+
+
+def test_generate_batch_bounds_fills_in_flight(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path)
+    monkeypatch.setattr(api, "settings", api.Settings(workers=2))
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+    original = api._fill_batch_item
+
+    def tracking(*args: typing.Any) -> typing.Any:
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.02)
+            return original(*args)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(api, "_fill_batch_item", tracking)
+    reads = [0]
+    finished = [0]
+    held = [0]
+    read_upload = api._read_upload
+
+    async def counting_read(upload: UploadFile) -> bytes:
+        if upload.filename == worksheet.name:
+            reads[0] += 1
+            held[0] = max(held[0], reads[0] - finished[0])
+        return await read_upload(upload)
+
+    monkeypatch.setattr(api, "_read_upload", counting_read)
+
+    async def collect() -> bytes:
+        uploads = [_upload(worksheet) for _ in range(6)]
+        resp = await api.generate_batch(uploads, _upload(template))
+        # Worksheets stay in their uploads until the response is streamed.
+        assert reads[0] == 0
+        chunks = []
+        async for chunk in resp.body_iterator:
+            finished[0] += 1
+            chunks.append(chunk)
+        assert all(upload.file.closed for upload in uploads)
+        return b"".join(chunks)
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(collect())))
+    assert len(archive.namelist()) == 7
+    assert peak[0] <= 2
+    # Only worksheets whose fills are in flight have been read.
+    assert reads[0] == 6
+    assert held[0] <= 3
+
+
+def test_generate_batch_limits(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    template, worksheet = _make_docs(tmp_path)
+    monkeypatch.setattr(api, "TEMPLATE_DIR", tmp_path)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.generate_batch([_upload(worksheet)]))
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(api.generate_batch([_upload(worksheet)], template_id="0" * 64))
+    assert exc.value.status_code == 404
+
+    template_id = asyncio.run(api.register_template(_upload(template)))["id"]
+    with monkeypatch.context() as m:
+        m.setattr(api, "MAX_SIZE", worksheet.stat().st_size - 1)
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(
+                api.generate_batch([_upload(worksheet)], template_id=template_id)
+            )
+    assert exc.value.status_code == 413
+
+    monkeypatch.setattr(api, "MAX_BATCH_SIZE", worksheet.stat().st_size)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(
+            api.generate_batch(
+                [_upload(worksheet), _upload(worksheet)], _upload(template)
+            )
+        )
+    assert exc.value.status_code == 413
@@ -1,3 +1,4 @@
+from io import BytesIO
 from pathlib import Path
 import typing
 import pytest
@@ -6,7 +7,15 @@ if not typing.TYPE_CHECKING:
     pytest.importorskip("docx")
 from docx import Document
 
-from scdocbuilder.io import load_document, save_document, validate_input_files
+from scdocbuilder.processing import extract_fields
+from scdocbuilder.io import (
+    MAX_SIZE,
+    clone_document,
+    load_document,
+    read_worksheet,
+    save_document,
+    validate_input_files,
+)
 
 
 def test_load_document_and_save(tmp_path: Path) -> None:
@@ -34,3 +43,215 @@ def test_validate_input_files_rejects_directories(tmp_path: Path) -> None:
     directory.mkdir()
     with pytest.raises(FileNotFoundError):
         validate_input_files(directory, directory)
+
+
+def test_clone_document_is_independent(tmp_path: Path) -> None:
+    path = tmp_path / "doc.docx"
+    doc = Document()
+    doc.add_paragraph("Body")
+    doc.sections[0].header.add_paragraph("Header")
+    doc.save(str(path))
+    original = load_document(path)
+
+    clone = clone_document(original)
+    clone.paragraphs[0].text = "Changed"
+    clone.sections[0].header.paragraphs[-1].text = "New header"
+
+    assert original.paragraphs[0].text == "Body"
+    assert original.sections[0].header.paragraphs[-1].text == "Header"
+    out = tmp_path / "out.docx"
+    save_document(clone, out)
+    saved = Document(str(out))
+    assert saved.paragraphs[0].text == "Changed"
+    assert saved.sections[0].header.paragraphs[-1].text == "New header"
+
+
+def test_clone_document_after_reading_paragraphs(tmp_path: Path) -> None:
+    doc = Document()
+    doc.add_paragraph("Hello {Applicant name}")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "Cell"
+    stream = BytesIO()
+    doc.save(stream)
+    original = load_document(stream.getvalue())
+    assert original.paragraphs and original.tables
+
+    clone = clone_document(original)
+    clone.paragraphs[0].text = "Hello Bob"
+    clone.tables[0].cell(0, 0).text = "Changed"
+
+    saved = Document(BytesIO(typing.cast(bytes, save_document(clone))))
+    assert saved.paragraphs[0].text == "Hello Bob"
+    assert saved.tables[0].cell(0, 0).text == "Changed"
+    assert original.paragraphs[0].text == "Hello {Applicant name}"
+
+
+def test_read_worksheet_matches_python_docx(tmp_path: Path) -> None:
+    doc = Document()
+    para = doc.add_paragraph("Applicant name: A\tB")
+    run = para.add_run("x")
+    run.add_break()
+    run.add_text("y")
+    doc.add_paragraph("Airplane model:")
+    doc.add_paragraph("Line1")
+    doc.add_paragraph("Line2")
+    table = doc.add_table(rows=3, cols=3)
+    table.cell(0, 0).text = "Type of airplane:"
+    table.cell(0, 1).text = "Jet"
+    table.cell(1, 0).merge(table.cell(1, 1)).text = "TC number"
+    table.cell(1, 2).merge(table.cell(2, 2)).text = "merged"
+    table.cell(2, 0).merge(table.cell(2, 1))
+    table.cell(2, 0).text = "Date of application:"
+    nested = table.cell(0, 2).add_table(rows=1, cols=2)
+    nested.cell(0, 0).text = "Subject of special conditions:"
+    nested.cell(0, 1).text = "nested"
+    path = tmp_path / "w.docx"
+    doc.save(str(path))
+
+    loaded = load_document(path)
+    text = read_worksheet(path)
+
+    assert text.paragraphs == [p.text for p in loaded.paragraphs]
+    assert text.rows == [
+        (row.cells[0].text, row.cells[1].text)
+        for tbl in loaded.tables
+        for row in tbl.rows
+        if len(row.cells) >= 2
+    ]
+    assert extract_fields(text) == extract_fields(loaded)
+
+
+def test_read_worksheet_rejects_non_docx(tmp_path: Path) -> None:
+    bogus = tmp_path / "fake.docx"
+    bogus.write_text("not a real docx")
+    with pytest.raises(ValueError):
+        read_worksheet(bogus)
+
+
+def _raw_member(path: Path, name: str) -> bytes:
+    import zipfile
+
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(name)
+        assert zf.fp is not None
+        zf.fp.seek(info.header_offset + 26)
+        name_len, extra_len = (
+            int.from_bytes(zf.fp.read(2), "little"),
+            int.from_bytes(zf.fp.read(2), "little"),
+        )
+        zf.fp.seek(name_len + extra_len, 1)
+        return zf.fp.read(info.compress_size)
+
+
+def test_save_document_copies_untouched_parts_raw(tmp_path: Path) -> None:
+    import zipfile
+
+    from scdocbuilder.processing import fill_document, modified_parts
+
+    path = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{x}")
+    doc.save(str(path))
+
+    loaded = load_document(path)
+    fill_document(loaded, {"{x}": "VAL"})
+    assert modified_parts(loaded) == {"/word/document.xml"}
+    out = tmp_path / "out.docx"
+    save_document(loaded, out, only_modified=True)
+
+    with zipfile.ZipFile(out) as zf:
+        assert zf.testzip() is None
+    assert Document(str(out)).paragraphs[0].text == "VAL"
+    for name in ("docProps/thumbnail.jpeg", "word/styles.xml"):
+        assert _raw_member(out, name) == _raw_member(path, name)
+
+
+def test_zip_part_writer_copies_streamed_members(tmp_path: Path) -> None:
+    import io
+    import zipfile
+
+    from scdocbuilder.io import _ZipPartWriter
+
+    class Unseekable(io.RawIOBase):
+        def __init__(self) -> None:
+            self.data = bytearray()
+
+        def writable(self) -> bool:
+            return True
+
+        def write(self, b: typing.Any) -> int:
+            self.data += b
+            return len(b)
+
+    # Written without seeking, so members carry a trailing data descriptor.
+    stream = Unseekable()
+    sink = typing.cast(typing.IO[bytes], stream)
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("a.txt", b"alpha" * 100)
+    source = bytes(stream.data)
+
+    out = BytesIO()
+    with zipfile.ZipFile(BytesIO(source)) as src, zipfile.ZipFile(out, "w") as dst:
+        writer = _ZipPartWriter(src, dst)
+        assert writer.copy_raw("a.txt")
+        assert not writer.copy_raw("missing.txt")
+        dst.writestr("b.txt", b"beta")
+
+    with zipfile.ZipFile(BytesIO(out.getvalue())) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["a.txt", "b.txt"]
+        assert zf.read("a.txt") == b"alpha" * 100
+        assert zf.getinfo("a.txt").flag_bits & 0x08 == 0
+        assert zf.getinfo("a.txt").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_save_document_reserializes_xml_by_default(tmp_path: Path) -> None:
+    path = tmp_path / "t.docx"
+    Document().save(str(path))
+    loaded = load_document(path)
+    loaded.styles.add_style("Custom", 1)
+    loaded.add_paragraph("Added")
+    out = tmp_path / "out.docx"
+    save_document(loaded, out)
+
+    saved = Document(str(out))
+    assert saved.paragraphs[-1].text == "Added"
+    assert "Custom" in [s.name for s in saved.styles]
+    assert _raw_member(out, "docProps/thumbnail.jpeg") == _raw_member(
+        path, "docProps/thumbnail.jpeg"
+    )
+
+
+def test_in_memory_load_read_and_save(tmp_path: Path) -> None:
+    ws = Document()
+    ws.add_paragraph("Applicant name: Foo")
+    buf = BytesIO()
+    ws.save(buf)
+    data = buf.getvalue()
+
+    assert load_document(data).paragraphs[0].text == "Applicant name: Foo"
+    assert load_document(BytesIO(data)).paragraphs[0].text == "Applicant name: Foo"
+    assert read_worksheet(data).paragraphs == ["Applicant name: Foo"]
+    assert read_worksheet(BytesIO(data)) == read_worksheet(data)
+
+    doc = load_document(data)
+    doc.paragraphs[0].text = "Changed"
+    saved = save_document(doc)
+    assert isinstance(saved, bytes)
+    assert load_document(saved).paragraphs[0].text == "Changed"
+
+    stream = BytesIO()
+    assert save_document(doc, stream) is None
+    assert stream.getvalue() == saved
+
+
+def test_in_memory_sources_are_validated() -> None:
+    with pytest.raises(ValueError):
+        load_document(b"not a zip")
+    with pytest.raises(ValueError):
+        read_worksheet(BytesIO(b"PK" + b"\0" * MAX_SIZE))
+
+
+@pytest.mark.parametrize("reader", [load_document, read_worksheet])
+def test_corrupt_archive_is_value_error(reader: typing.Any) -> None:
+    with pytest.raises(ValueError):
+        reader(b"PK\x03\x04" + b"\0" * 64)
@@ -1,12 +1,11 @@
 from typing import Any
-from types import MethodType
 import typing
 import pytest
 import re
 from pathlib import Path
 
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
 
 if typing.TYPE_CHECKING:
     from docx import Document
@@ -30,32 +29,32 @@ def _patch_iter_textbox(monkeypatch: Any, text: str) -> None:
     monkeypatch.setattr(processing, "_iter_textbox_paragraphs", lambda part: [para])
 
 
-def _patch_textbox(monkeypatch: Any, doc: Any, text: str) -> None:
-    # Only used for testing _iter_textbox_paragraphs itself
-    para = Document().add_paragraph(text)
-    p_el = para._p
-
-    class FakeTbx:
-        def xpath(self, query: str) -> list[Any]:
-            return [p_el]
-
-    def fake_xpath(self: Any, query: str) -> list[FakeTbx]:
-        return [FakeTbx()]
-
-    monkeypatch.setattr(
-        doc.part.element,
-        "xpath",
-        MethodType(fake_xpath, doc.part.element),
+def _add_textbox(doc: Any, text: str) -> None:
+    run = doc.add_paragraph().add_run()
+    run._r.append(
+        parse_xml(
+            f"<w:pict {nsdecls('w')} xmlns:v='urn:schemas-microsoft-com:vml'>"
+            "<v:shape><v:textbox><w:txbxContent>"
+            f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+            "</w:txbxContent></v:textbox></v:shape></w:pict>"
+        )
     )
 
 
-def test_iter_textbox_paragraphs(monkeypatch: Any) -> None:
+def test_iter_textbox_paragraphs() -> None:
     doc = Document()
-    _patch_textbox(monkeypatch, doc, "Box")
+    _add_textbox(doc, "Box")
     paras = _iter_textbox_paragraphs(doc.part)
     assert [p.text for p in paras] == ["Box"]
 
 
+def test_replace_placeholders_real_textbox() -> None:
+    doc = Document()
+    _add_textbox(doc, "{x}")
+    replace_placeholders(doc, {"{x}": "VAL"})
+    assert [p.text for p in _iter_textbox_paragraphs(doc.part)] == ["VAL"]
+
+
 def test_set_paragraph_text() -> None:
     doc = Document()
     p = doc.add_paragraph()
@@ -231,3 +230,212 @@ def test_replace_placeholders_overlapping_keys() -> None:
     doc.add_paragraph("{A1}")
     replace_placeholders(doc, {"{A}": "X", "{A1}": "Y"})
     assert doc.paragraphs[0].text == "Y"
+
+
+def test_compile_template_records_sites(tmp_path: Path) -> None:
+    doc = Document()
+    doc.add_paragraph("No placeholders here")
+    para = doc.add_paragraph()
+    para.add_run("{A} and {B")
+    para.add_run("}")
+    doc.sections[0].header.add_paragraph("{A}")
+
+    compiled = processing.compile_template(doc, ["{A}", "{B}"])
+
+    assert compiled.placeholders == frozenset({"{A}", "{B}"})
+    assert len(compiled.sites) == 2
+    body, header = compiled.sites
+    assert body.part == "/word/document.xml"
+    assert sorted(body.spans) == [("{A}", 0, 0), ("{B}", 0, 1)]
+    assert header.part.startswith("/word/header")
+
+
+def test_fill_compiled_matches_replace_placeholders(tmp_path: Path) -> None:
+    doc = Document()
+    doc.add_paragraph("Plain text")
+    bold = doc.add_paragraph().add_run("{A}")
+    bold.bold = True
+    split = doc.add_paragraph()
+    split.add_run("{na")
+    split.add_run("me} {A}")
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = "{name}"
+    doc.sections[0].header.add_paragraph("Header {A}")
+    path = tmp_path / "t.docx"
+    doc.save(str(path))
+
+    values = {"{A}": "1", "{name}": "Alice"}
+    compiled = processing.compile_template(Document(str(path)), values)
+
+    expected = Document(str(path))
+    replace_placeholders(expected, values)
+    for _ in range(2):
+        filled = Document(str(path))
+        processing.fill_compiled(filled, compiled, values)
+        assert [p.text for p in filled.paragraphs] == [
+            p.text for p in expected.paragraphs
+        ]
+        assert filled.paragraphs[1].runs[0].bold is True
+        assert filled.tables[0].cell(0, 0).text == "Alice"
+        assert filled.sections[0].header.paragraphs[-1].text == "Header 1"
+
+
+def test_fill_compiled_skips_missing_values(tmp_path: Path) -> None:
+    doc = Document()
+    doc.add_paragraph("{A} {B}")
+    compiled = processing.compile_template(doc, ["{A}", "{B}"])
+    processing.fill_compiled(doc, compiled, {"{A}": "1"})
+    assert doc.paragraphs[0].text == "1 {B}"
+
+
+def test_replace_placeholders_single_pass() -> None:
+    """Replacement text is never rescanned for further placeholders."""
+    doc = Document()
+    doc.add_paragraph("{A} {B}")
+    replace_placeholders(doc, {"{A}": "{B}", "{B}": "2"})
+    assert doc.paragraphs[0].text == "{B} 2"
+
+
+def test_replace_placeholders_many_placeholders_mixed_runs() -> None:
+    values = {f"{{F{i}}}": str(i) for i in range(300)}
+    doc = Document()
+    para = doc.add_paragraph()
+    bold = para.add_run("{F1} {F10} ")
+    bold.bold = True
+    para.add_run("{F299}")
+    split = doc.add_paragraph()
+    split.add_run("x {F2")
+    split.add_run("5} y {F3}")
+    replace_placeholders(doc, values)
+    assert para.text == "1 10 299"
+    assert para.runs[0].bold is True
+    assert split.text == "x 25 y 3"
+
+
+def test_fill_document_walks_each_paragraph_once(monkeypatch: Any) -> None:
+    doc = Document()
+    doc.add_paragraph("{x} [[OPTION_1]]A[[/OPTION_1]][[OPTION_2]]B[[/OPTION_2]]")
+    table = doc.add_table(rows=1, cols=2)
+    merged = table.cell(0, 0).merge(table.cell(0, 1))
+    merged.text = "{x}"
+    doc.sections[0].header.add_paragraph("{x}")
+
+    visited: list[Any] = []
+    original = processing._replace_in_paragraph
+
+    def spy(paragraph: Any, *args: Any) -> None:
+        visited.append(paragraph._p)
+        original(paragraph, *args)
+
+    monkeypatch.setattr(processing, "_replace_in_paragraph", spy)
+    processing.fill_document(doc, {"{x}": "V", "{Action option}": "1"})
+
+    assert len(visited) == len({id(p) for p in visited})
+    assert doc.paragraphs[0].text == "V A"
+    assert table.cell(0, 0).text == "V"
+    assert doc.sections[0].header.paragraphs[-1].text == "V"
+
+
+def test_fill_compiled_resolves_options(tmp_path: Path) -> None:
+    doc = Document()
+    doc.add_paragraph("[[OPTION_1]]A[[/OPTION_1]][[OPTION_2]]B[[/OPTION_2]]")
+    doc.add_paragraph("{x}")
+    compiled = processing.compile_template(doc, ["{x}"])
+    assert [site.options for site in compiled.sites] == [True, False]
+    processing.fill_compiled(doc, compiled, {"{x}": "V", "{Action option}": "2"})
+    assert [p.text for p in doc.paragraphs] == ["B", "V"]
+
+
+def test_extract_fields_multiline_stops_at_next_field_and_blank() -> None:
+    doc = Document()
+    doc.add_paragraph("A:")
+    doc.add_paragraph("  one ")
+    doc.add_paragraph("two")
+    doc.add_paragraph("A detail:")
+    doc.add_paragraph("three")
+    doc.add_paragraph("")
+    doc.add_paragraph("ignored")
+    doc.add_paragraph("B:")
+    fields = processing.extract_fields(
+        doc, {"A:": "{A}", "A detail:": "{AD}", "B:": "{B}"}
+    )
+    assert fields == {"{A}": "one\ntwo", "{AD}": "three", "{B}": ""}
+
+
+def test_extract_fields_large_schema_table_prefix() -> None:
+    mappings = {f"Field {i}:": f"{{F{i}}}" for i in range(500)}
+    doc = Document()
+    doc.add_paragraph("Field 42: forty-two")
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Field 420: extra label"
+    table.cell(0, 1).text = "Value"
+    fields = processing.extract_fields(doc, mappings)
+    assert fields == {"{F42}": "forty-two", "{F420}": "Value"}
+
+
+def test_fill_document_visits_linked_headers_once(monkeypatch: Any) -> None:
+    from docx.enum.section import WD_SECTION
+
+    doc = Document()
+    doc.sections[0].header.is_linked_to_previous = False
+    doc.sections[0].header.paragraphs[0].text = "{x}"
+    for _ in range(3):
+        doc.add_section(WD_SECTION.NEW_PAGE)
+    parts_before = len(list(doc.part.package.iter_parts()))
+
+    calls: list[Any] = []
+    original = processing._iter_textbox_paragraphs
+
+    def spy(part: Any) -> Any:
+        calls.append(part)
+        return original(part)
+
+    monkeypatch.setattr(processing, "_iter_textbox_paragraphs", spy)
+    processing.fill_document(doc, {"{x}": "V"})
+
+    # Body plus the single defined header; linked footers add no parts.
+    assert len(calls) == 2
+    assert len(list(doc.part.package.iter_parts())) == parts_before
+    assert all(s.header.paragraphs[0].text == "V" for s in doc.sections)
+
+
+def test_diff_compiled_reports_locations_and_missing() -> None:
+    doc = Document()
+    doc.add_paragraph("Intro")
+    doc.add_paragraph("{Applicant name} flies {Airplane model}")
+    doc.add_paragraph("[[OPTION_1]]a[[/OPTION_1]]")
+    compiled = processing.compile_template(doc)
+    before = [p.text for p in doc.paragraphs]
+
+    diff = processing.diff_compiled(
+        compiled, {"{Applicant name}": "Foo", "{TC number}": "T1"}
+    )
+
+    assert [p.text for p in doc.paragraphs] == before
+    applicant = diff["{Applicant name}"]
+    assert applicant["new"] == "Foo"
+    assert applicant["status"] == "replace"
+    assert applicant["locations"] == [{"part": "/word/document.xml", "path": [0, 1]}]
+    assert diff["{Airplane model}"]["status"] == "missing"
+    assert diff["{Airplane model}"]["new"] is None
+    assert diff["{TC number}"]["status"] == "unused"
+    assert diff["{TC number}"]["locations"] == []
+    assert diff["{Action option}"]["status"] == "missing"
+
+
+def test_fill_document_builds_pattern_once(monkeypatch: Any) -> None:
+    doc = Document()
+    for _ in range(5):
+        doc.add_paragraph("{x}")
+    calls: list[Any] = []
+    original = processing._placeholder_pattern
+
+    def counting(placeholders: Any) -> Any:
+        calls.append(placeholders)
+        return original(placeholders)
+
+    monkeypatch.setattr(processing, "_placeholder_pattern", counting)
+    processing.fill_document(doc, {"{x}": "V"})
+
+    assert len(calls) == 1
+    assert [p.text for p in doc.paragraphs] == ["V"] * 5
@@ -1,5 +1,6 @@
 """Tests for security utilities."""
 
+import io
 from pathlib import Path
 
 import pytest
@@ -92,3 +93,15 @@ def test_cleanup_uploads_handles_generic_oserror(monkeypatch: pytest.MonkeyPatch
     monkeypatch.setattr(Path, "unlink", fake_unlink)
     # Should not raise even if a generic OSError occurs
     cleanup_uploads(file_path)
+
+
+def test_reject_macros_in_memory() -> None:
+    """Bytes and file objects are scanned without touching the disk."""
+    reject_macros(b"PK plain document")
+    with pytest.raises(ValueError):
+        reject_macros(b"PK word/vbaProject.bin")
+
+    stream = io.BytesIO(b"PK plain document")
+    stream.seek(3)
+    reject_macros(stream)
+    assert stream.tell() == 3
@@ -97,3 +97,19 @@ def test_question_prompt_variants_are_detected() -> None:
     ws.add_paragraph("Ans17")
     # Should not raise
     validation.validate_mandatory_fields(ws)
+
+
+def test_validate_mandatory_fields_accepts_worksheet_text() -> None:
+    from scdocbuilder.processing import WorksheetText
+
+    text = WorksheetText(
+        paragraphs=[
+            "Applicant name: Foo",
+            "Airplane model: Bar",
+            "Question 15: A",
+            "Question 16: B",
+        ],
+        rows=[],
+    )
+    with pytest.raises(ValueError, match="Question 17"):
+        validation.validate_mandatory_fields(text)
@@ -0,0 +1,265 @@
+import logging
+from pathlib import Path
+import typing
+from typing import Any
+
+import pytest
+
+if not typing.TYPE_CHECKING:
+    pytest.importorskip("docx")
+from docx import Document
+
+from scdocbuilder.cli import ErrorCode, main
+from scdocbuilder.watch import FolderWatcher
+
+
+def _write_worksheet(path: Path, applicant: str) -> None:
+    ws = Document()
+    ws.add_paragraph(f"Applicant name: {applicant}")
+    ws.add_paragraph("Airplane model: Bar")
+    for question in (15, 16, 17):
+        ws.add_paragraph(f"Question {question}:")
+        ws.add_paragraph("Answer")
+    ws.save(str(path))
+
+
+def _write_template(path: Path, text: str = "{Applicant name}") -> None:
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(str(path))
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_watcher_waits_for_settled_files(tmp_path: Path) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    clock = _Clock()
+    watcher = FolderWatcher(template, inbox, settle=2.0, clock=clock)
+
+    _write_worksheet(inbox / "a.docx", "A")
+    assert watcher.poll() == []
+    clock.now = 1.0
+    assert watcher.poll() == []
+    clock.now = 2.5
+    (result,) = watcher.poll()
+    assert result.ok
+    assert Document(str(result.output)).paragraphs[0].text == "A"
+
+    # Neither the processed worksheet nor the output is picked up again.
+    clock.now = 10.0
+    assert watcher.poll() == []
+    assert watcher.poll() == []
+
+
+def test_watcher_reprocesses_replaced_worksheet_and_template(
+    tmp_path: Path,
+) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    out = tmp_path / "out"
+    watcher = FolderWatcher(template, inbox, out, settle=0)
+
+    _write_worksheet(inbox / "a.docx", "A")
+    watcher.poll()
+    assert len(watcher.poll()) == 1
+
+    _write_template(template, "Dear {Applicant name}")
+    _write_worksheet(inbox / "a.docx", "B")
+    watcher.poll()
+    (result,) = watcher.poll()
+    assert result.output is not None and result.output.parent == out.resolve()
+    assert Document(str(result.output)).paragraphs[0].text == "Dear B"
+
+
+def test_watcher_reports_bad_worksheet(tmp_path: Path) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    bad = Document()
+    bad.add_paragraph("Applicant name: A")
+    bad.save(str(inbox / "bad.docx"))
+    watcher = FolderWatcher(template, inbox, settle=0)
+
+    watcher.poll()
+    (result,) = watcher.poll()
+    assert result.error_code == ErrorCode.EVALID
+    assert watcher.poll() == []
+
+
+def test_watcher_keeps_last_good_template(tmp_path: Path, caplog: Any) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    clock = _Clock()
+    watcher = FolderWatcher(template, inbox, tmp_path / "out", clock=clock)
+
+    template.write_bytes(b"PK half-written")
+    _write_worksheet(inbox / "a.docx", "A")
+    assert watcher.poll() == []
+    clock.now = 3.0
+    # The template settled but is unreadable; the old one is used.
+    (result,) = watcher.poll()
+    assert Document(str(result.output)).paragraphs[0].text == "A"
+    assert "Keeping the previous template" in caplog.text
+
+    template.unlink()
+    _write_worksheet(inbox / "b.docx", "B")
+    watcher.poll()
+    clock.now = 6.0
+    (result,) = watcher.poll()
+    assert Document(str(result.output)).paragraphs[0].text == "B"
+
+
+def test_watcher_waits_for_template_to_settle(tmp_path: Path) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    clock = _Clock()
+    watcher = FolderWatcher(template, inbox, tmp_path / "out", clock=clock)
+    _write_worksheet(inbox / "a.docx", "A")
+    watcher.poll()
+
+    _write_template(template, "Dear {Applicant name}")
+    clock.now = 3.0
+    assert watcher.poll() == []
+    clock.now = 6.0
+    (result,) = watcher.poll()
+    assert Document(str(result.output)).paragraphs[0].text == "Dear A"
+
+
+def test_restarted_watcher_skips_processed_worksheets(tmp_path: Path) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    _write_worksheet(inbox / "a.docx", "A")
+    watcher = FolderWatcher(template, inbox, settle=0)
+    watcher.poll()
+    assert len(watcher.poll()) == 1
+
+    restarted = FolderWatcher(template, inbox, settle=0)
+    restarted.poll()
+    assert restarted.poll() == []
+
+    _write_worksheet(inbox / "a.docx", "Changed")
+    restarted.poll()
+    (result,) = restarted.poll()
+    assert Document(str(result.output)).paragraphs[0].text == "Changed"
+
+
+def test_watcher_fills_output_like_names_with_separate_output(
+    tmp_path: Path,
+) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    _write_worksheet(inbox / "scan_20240101_120000.docx", "A")
+    watcher = FolderWatcher(template, inbox, tmp_path / "out", settle=0)
+    watcher.poll()
+    (result,) = watcher.poll()
+    assert Document(str(result.output)).paragraphs[0].text == "A"
+
+
+def test_watcher_survives_manifest_write_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    _write_worksheet(inbox / "a.docx", "A")
+    watcher = FolderWatcher(template, inbox, settle=0)
+
+    def fail(*args: Any) -> None:
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(watcher._manifest, "record", fail)
+    monkeypatch.setattr(watcher._manifest, "save", fail)
+    watcher.poll()
+    with caplog.at_level(logging.ERROR):
+        (result,) = watcher.poll()
+    assert result.ok
+    assert "Cannot record" in caplog.text
+    assert "Cannot save manifest" in caplog.text
+    assert watcher.poll() == []
+
+
+def test_watcher_run_keeps_polling_after_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    watcher = FolderWatcher(template, inbox)
+    polls = []
+
+    def flaky_poll() -> list[Any]:
+        polls.append(None)
+        if len(polls) == 1:
+            raise OSError("disk full")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(watcher, "poll", flaky_poll)
+    monkeypatch.setattr("scdocbuilder.watch.time.sleep", lambda seconds: None)
+    with caplog.at_level(logging.ERROR), pytest.raises(KeyboardInterrupt):
+        watcher.run()
+    assert len(polls) == 2
+    assert "disk full" in caplog.text
+
+
+def test_main_watch_missing_directory(tmp_path: Path) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    with pytest.raises(SystemExit) as exc:
+        main(["watch", str(tmp_path / "missing"), "--template", str(template)])
+    assert exc.value.code == ErrorCode.ENOFILE
+
+
+def test_main_watch_prints_outputs(
+    tmp_path: Path, capsys: Any, monkeypatch: Any
+) -> None:
+    template = tmp_path / "t.docx"
+    _write_template(template)
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    _write_worksheet(inbox / "a.docx", "A")
+    polls = []
+
+    def fake_sleep(seconds: float) -> None:
+        polls.append(seconds)
+        if len(polls) == 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr("scdocbuilder.watch.time.sleep", fake_sleep)
+    main(
+        [
+            "watch",
+            str(inbox),
+            "--template",
+            str(template),
+            "--settle",
+            "0",
+            "--interval",
+            "0.5",
+        ]
+    )
+
+    (line,) = capsys.readouterr().out.split()
+    assert Path(line).name.startswith("a_")
+    assert polls == [0.5, 0.5]